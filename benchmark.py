@@ -0,0 +1,283 @@
+"""
+Benchmarks for Terminal Fun.
+Times lesson loading, rendering, navigation and progress persistence on a
+synthetic curriculum (or a real one) without starting the GTK application.
+
+Usage: python3 benchmark.py [--lessons N] [--exercises N] [--repeat N] [--json]
+       python3 benchmark.py --generate DIR [--lessons N] [--exercises N]
+"""
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from lesson_loader import LessonLoader
+from markdown_renderer import RenderCache, markdown_to_pango
+from progress_tracker import ProgressTracker, SQLiteProgressTracker
+
+
+_WORDS = (
+    "terminal shell command file directory path output input pipe process "
+    "permission user group editor history variable alias script package "
+    "service network archive search pattern text line option argument"
+).split()
+
+_VERIFY_SPECS = (
+    "type: file_exists\npath: ~/practice/file{n}.txt",
+    "type: directory_exists\npath: ~/practice/dir{n}",
+    "type: current_directory\npath: ~/practice",
+    "type: command_output\ncommand: cat ~/practice/file{n}.txt\ncontains: line {n}",
+)
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    text = ' '.join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraph(rng: random.Random) -> str:
+    """A paragraph with the inline markup lessons use."""
+    parts = []
+    for _ in range(rng.randint(3, 6)):
+        sentence = _sentence(rng)
+        roll = rng.random()
+        if roll < 0.3:
+            sentence += f" Try `{rng.choice(_WORDS)} --{rng.choice(_WORDS)}` next."
+        elif roll < 0.45:
+            sentence += f" **{rng.choice(_WORDS).title()}** matters."
+        elif roll < 0.55:
+            sentence += f" Use **`{rng.choice(_WORDS)}`** for this."
+        parts.append(sentence)
+    return ' '.join(parts)
+
+
+def generate_lesson(rng: random.Random, order: int, exercises: int, paragraphs: int) -> str:
+    """Markdown source of one synthetic lesson."""
+    title = ' '.join(rng.choice(_WORDS) for _ in range(3)).title()
+    lines = [
+        '---',
+        f'title: {title}',
+        f'description: {_sentence(rng, 8)}',
+        f'order: {order}',
+        '---',
+        '',
+        '## Instructions',
+        '',
+    ]
+    for section in range(paragraphs):
+        if section % 3 == 0:
+            lines += [f'### {rng.choice(_WORDS).title()} {rng.choice(_WORDS)}', '']
+        lines += [_paragraph(rng), '']
+        if section % 2 == 0:
+            lines += ['```bash', f'{rng.choice(_WORDS)} -l ~/practice/{rng.choice(_WORDS)}', '```', '']
+
+    for n in range(1, exercises + 1):
+        lines += [
+            f'## Exercise {n}: {rng.choice(_WORDS).title()} practice',
+            '',
+            _paragraph(rng),
+            '',
+            f'**Command:** `echo "line {n}" > ~/practice/file{n}.txt`',
+            '',
+            '**Verify:**',
+            '```yaml',
+            rng.choice(_VERIFY_SPECS).format(n=n),
+            '```',
+            '',
+        ]
+    return '\n'.join(lines)
+
+
+def generate_curriculum(dest: Path, lessons: int = 2000, categories: int = 20,
+                        exercises: int = 6, paragraphs: int = 12, seed: int = 0) -> Path:
+    """Write a synthetic curriculum of `lessons` lessons under dest.
+
+    The same arguments always produce the same files.
+    """
+    rng = random.Random(seed)
+    dest.mkdir(parents=True, exist_ok=True)
+    per_category = max(1, -(-lessons // categories))
+    for index in range(lessons):
+        category_dir = dest / f"category-{index // per_category:03d}"
+        category_dir.mkdir(exist_ok=True)
+        order = index % per_category + 1
+        (category_dir / f"{order:04d}-lesson.md").write_text(
+            generate_lesson(rng, order, exercises, paragraphs)
+        )
+    return dest
+
+
+def measure(func: Callable[[], object], repeat: int,
+            setup: Optional[Callable[[], object]] = None) -> Dict:
+    """Time func over `repeat` runs; setup (untimed) runs before each one."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        'runs': repeat,
+        'min_ms': min(times) * 1000,
+        'median_ms': statistics.median(times) * 1000,
+        'max_ms': max(times) * 1000,
+    }
+
+
+def run_benchmarks(lessons_dir: Path, work_dir: Path, repeat: int = 5) -> Dict[str, Dict]:
+    """Run every benchmark against the curriculum in lessons_dir."""
+    results: Dict[str, Dict] = {}
+    cache_file = work_dir / "lesson-cache.json"
+
+    def drop_cache():
+        cache_file.unlink(missing_ok=True)
+
+    # Lesson loading: without the compiled cache, building it, and reusing it
+    results['loader: construct, no cache'] = measure(
+        lambda: LessonLoader(str(lessons_dir), use_cache=False), repeat)
+    results['loader: construct, cold cache'] = measure(
+        lambda: LessonLoader(str(lessons_dir), cache_file=str(cache_file)), repeat, setup=drop_cache)
+    LessonLoader(str(lessons_dir), cache_file=str(cache_file))
+    results['loader: construct, warm cache'] = measure(
+        lambda: LessonLoader(str(lessons_dir), cache_file=str(cache_file)), repeat)
+
+    loader = LessonLoader(str(lessons_dir), cache_file=str(cache_file))
+    categories = loader.get_categories()
+    keys = [(c, lesson['slug']) for c in categories for lesson in loader.get_lessons(c)]
+
+    results['catalog: get_lessons, all categories'] = measure(
+        lambda: [loader.get_lessons(c) for c in categories], repeat)
+    results['catalog: navigate every lesson'] = measure(
+        lambda: [(loader.get_adjacent_lesson(c, s, 1), loader.get_adjacent_lesson(c, s, -1),
+                  loader.get_lesson_index(c, s)) for c, s in keys] +
+                [loader.get_next_category(c) for c in categories], repeat)
+    # Bodies are parsed the first time a lesson is opened
+    fresh: List[LessonLoader] = []
+
+    def new_loader():
+        fresh[:] = [LessonLoader(str(lessons_dir), use_cache=False)]
+
+    results['load_lesson: every lesson, first open'] = measure(
+        lambda: [fresh[0].load_lesson(c, s) for c, s in keys], repeat, setup=new_loader)
+    for c, s in keys:
+        loader.load_lesson(c, s)
+    results['load_lesson: every lesson, cached'] = measure(
+        lambda: [loader.load_lesson(c, s) for c, s in keys], repeat)
+    results['parse_lesson: every lesson'] = measure(
+        lambda: [loader.parse_lesson(c, s) for c, s in keys], repeat)
+
+    # Parsing and rendering on text already in memory
+    sources = [(lessons_dir / c / f"{s}.md").read_text() for c, s in keys]
+    bodies = [loader._split_frontmatter(text)[1] for text in sources]
+    results['_parse_body_sections: every lesson'] = measure(
+        lambda: [loader._parse_body_sections(body) for body in bodies], repeat)
+
+    instructions = [loader.load_lesson(c, s)['instructions'] for c, s in keys]
+    results['markdown_to_pango: every lesson'] = measure(
+        lambda: [markdown_to_pango(text) for text in instructions], repeat)
+    render_cache = RenderCache(maxsize=len(keys) + 1)
+    for key, text in zip(keys, instructions):
+        render_cache.render(key, text)
+    results['RenderCache: every lesson, hits'] = measure(
+        lambda: [render_cache.render(key, text) for key, text in zip(keys, instructions)], repeat)
+
+    # Progress persistence: one exercise completion per lesson, then a reload
+    exercise_keys = keys[:500]
+
+    def complete_all(tracker):
+        for c, s in exercise_keys:
+            tracker.complete_exercise(c, s, 0)
+        tracker.close()
+
+    def progress_file(name: str) -> Path:
+        path = work_dir / name
+        for stale in (path, path.with_name(path.name + '.journal')):
+            stale.unlink(missing_ok=True)
+        return path
+
+    n = len(exercise_keys)
+    results[f'progress: {n} completions, write each'] = measure(
+        lambda: complete_all(ProgressTracker(progress_file("sync.json"))), repeat)
+    results[f'progress: {n} completions, journal'] = measure(
+        lambda: complete_all(ProgressTracker(progress_file("journal.json"), use_journal=True,
+                                             compact_after=n * 2)), repeat)
+    results[f'progress: {n} completions, write-behind'] = measure(
+        lambda: complete_all(ProgressTracker(progress_file("delayed.json"), write_delay=60,
+                                             use_journal=True)), repeat)
+    results[f'progress: {n} completions, sqlite'] = measure(
+        lambda: complete_all(SQLiteProgressTracker(str(progress_file(f"progress-{time.time_ns()}.db")))),
+        repeat)
+
+    complete_all(ProgressTracker(progress_file("load.json")))
+    results[f'progress: load {n} lessons'] = measure(
+        lambda: ProgressTracker(str(work_dir / "load.json")), repeat)
+    loaded = ProgressTracker(str(work_dir / "load.json"))
+    results['progress: get_stats'] = measure(loaded.get_stats, repeat)
+
+    return results
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    """Results as an aligned table."""
+    width = max(len(name) for name in results)
+    lines = [f"{'benchmark':<{width}}  {'min ms':>10}  {'median ms':>10}  {'max ms':>10}"]
+    for name, r in results.items():
+        lines.append(f"{name:<{width}}  {r['min_ms']:>10.2f}  {r['median_ms']:>10.2f}  {r['max_ms']:>10.2f}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark Terminal Fun's hot paths.")
+    parser.add_argument('--lessons-dir',
+                        help="benchmark this curriculum instead of a generated one")
+    parser.add_argument('--generate', metavar='DIR',
+                        help="only write a synthetic curriculum to DIR")
+    parser.add_argument('--lessons', type=int, default=2000,
+                        help="lessons in the synthetic curriculum (default: 2000)")
+    parser.add_argument('--categories', type=int, default=20,
+                        help="categories in the synthetic curriculum (default: 20)")
+    parser.add_argument('--exercises', type=int, default=6,
+                        help="exercises per synthetic lesson (default: 6)")
+    parser.add_argument('--paragraphs', type=int, default=12,
+                        help="instruction paragraphs per synthetic lesson (default: 12)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="runs per benchmark (default: 5)")
+    parser.add_argument('--json', action='store_true',
+                        help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        dest = generate_curriculum(Path(args.generate), args.lessons, args.categories,
+                                   args.exercises, args.paragraphs)
+        print(f"Wrote {args.lessons} lessons to {dest}")
+        return 0
+
+    work_dir = Path(tempfile.mkdtemp(prefix="terminal-fun-bench-"))
+    try:
+        if args.lessons_dir:
+            lessons_dir = Path(args.lessons_dir)
+        else:
+            lessons_dir = generate_curriculum(work_dir / "lessons", args.lessons, args.categories,
+                                              args.exercises, args.paragraphs)
+        results = run_benchmarks(lessons_dir, work_dir, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
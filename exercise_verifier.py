@@ -0,0 +1,404 @@
+"""
+Exercise verification for Terminal Fun.
+Checks the Verify specs parsed from lessons against the virtual home.
+"""
+
+import bisect
+import os
+import shlex
+import subprocess
+import uuid
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+
+SUPPORTED_TYPES = ('command_output', 'file_exists', 'directory_exists', 'current_directory')
+
+# Spec types answered by looking at the filesystem alone
+PATH_TYPES = ('file_exists', 'directory_exists')
+
+# Seconds each verification command may run before it is killed
+COMMAND_TIMEOUT = 5
+
+# Programs a verification command may run against the learner's own home:
+# they only read files (or change state of the throwaway verify shell)
+# (env and date are left out: `env rm ...` runs anything, `date -s` writes)
+_READ_ONLY_COMMANDS = frozenset((
+    'alias', 'cat', 'cd', 'df', 'du', 'echo', 'export', 'find', 'grep', 'head',
+    'history', 'id', 'jobs', 'ls', 'pgrep', 'printenv', 'printf', 'ps', 'pwd',
+    'sort', 'stat', 'tail', 'type', 'uname', 'uniq', 'wc', 'which', 'whoami',
+))
+# Programs that are read-only only for some subcommands
+_READ_ONLY_SUBCOMMANDS = {
+    'apt': frozenset(('list', 'policy', 'search', 'show')),
+    'git': frozenset(('diff', 'log', 'show', 'status')),
+    'snap': frozenset(('find', 'info', 'list')),
+    'systemctl': frozenset(('is-active', 'is-enabled', 'list-units', 'show', 'status')),
+}
+_FIND_ACTIONS = frozenset(('-delete', '-exec', '-execdir', '-ok', '-okdir',
+                           '-fprint', '-fprint0', '-fprintf', '-fls'))
+
+# Runs every command of a batch in one shell: $1 is the working directory,
+# $2 the per-batch marker, $3 the timeout and the rest are the commands.
+# Each command's output is followed by "<marker> <exit status>".
+_BATCH_SCRIPT = '''
+cd -- "$1" 2>/dev/null || cd -- "$HOME"
+marker="$2"
+limit="$3"
+shift 3
+for cmd in "$@"; do
+    timeout "$limit" /bin/bash -c "$cmd" </dev/null 2>&1
+    printf '\\n%s %d\\n' "$marker" "$?"
+done
+'''
+
+
+def _split_command(command: str) -> Optional[List[str]]:
+    """Shell words and operators of a command line, or None if it does not parse."""
+    lexer = shlex.shlex(str(command), posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        return list(lexer)
+    except ValueError:
+        return None
+
+
+def _is_operator(token: str) -> bool:
+    """Whether a token from _split_command is a control or redirection operator."""
+    return bool(token) and all(c in '();<>|&' for c in token)
+
+
+def _first_command(command: str) -> Optional[List[str]]:
+    """Words of the first command of a line: up to the first |, &&, ; or &."""
+    tokens = _split_command(command)
+    if tokens is None:
+        return None
+    words = []
+    for token in tokens:
+        if _is_operator(token) and '<' not in token and '>' not in token:
+            break
+        words.append(token)
+    return words
+
+
+def commands_match(ran: str, expected: str, whole_line: bool = False) -> bool:
+    """Whether a command line the learner ran does what an exercise asks.
+
+    Compares the first command of each line word by word, so spacing,
+    quoting and a different pipeline tail (`ps aux | head` for
+    `ps aux | head -n 10`) still match; whole_line compares every word.
+    """
+    split = _split_command if whole_line else _first_command
+    words = split(ran)
+    return bool(words) and words == split(expected)
+
+
+def is_read_only_command(command: str) -> bool:
+    """Whether running command can only read files.
+
+    Errs on the side of False: unknown programs, writing redirections,
+    command substitution and anything that does not parse count as side
+    effects.
+    """
+    if '`' in str(command) or '$(' in str(command):
+        return False
+    tokens = _split_command(command)
+    if tokens is None:
+        return False
+
+    segment: List[str] = []
+    segments = [segment]
+    for pos, token in enumerate(tokens):
+        if _is_operator(token):
+            if '>' in token:
+                target = tokens[pos + 1] if pos + 1 < len(tokens) else ''
+                duplicates_fd = token == '>&' and target.isdigit()
+                if not duplicates_fd and target != '/dev/null':
+                    return False
+            elif '<' not in token:
+                segment = []
+                segments.append(segment)
+            continue
+        segment.append(token)
+
+    for words in segments:
+        # Skip VAR=value prefixes and sudo with its options
+        while words and '=' in words[0]:
+            words = words[1:]
+        if words and words[0] == 'sudo':
+            words = words[1:]
+            while words and words[0].startswith('-'):
+                words = words[1:]
+        if not words or words[0] == '$':
+            continue
+        program, args = words[0], words[1:]
+        if any(a.startswith('--output') for a in args):
+            return False
+        if program in _READ_ONLY_SUBCOMMANDS:
+            subcommand = next((a for a in args if not a.startswith('-')), None)
+            if subcommand not in _READ_ONLY_SUBCOMMANDS[program]:
+                return False
+        elif program not in _READ_ONLY_COMMANDS:
+            return False
+        elif program == 'find' and _FIND_ACTIONS.intersection(args):
+            return False
+        elif program == 'sort' and any(
+                a.startswith('-') and not a.startswith('--') and 'o' in a for a in args):
+            return False
+        elif program == 'uniq' and len([a for a in args if not a.startswith('-')]) > 1:
+            # uniq INPUT OUTPUT writes OUTPUT
+            return False
+        elif program == 'history' and any(a.startswith('-') for a in args):
+            # -w, -a and -c rewrite or clear the history file
+            return False
+    return True
+
+
+def read_only_part(command: str) -> Optional[str]:
+    """The longest read-only tail of an && chain, or None if there is none.
+
+    `mkdir testdir && ls -ld testdir` gives `ls -ld testdir`: it checks
+    the result of the learner's command without redoing it.
+    """
+    parts = str(command).split('&&')
+    for start in range(len(parts)):
+        tail = '&&'.join(parts[start:]).strip()
+        if tail and is_read_only_command(tail):
+            return tail
+    return None
+
+
+class CommandRunner:
+    """Runs verification commands in a short-lived (optionally sandboxed) shell."""
+
+    def __init__(self, home: str, sandbox_argv: Optional[List[str]] = None,
+                 env: Optional[Dict[str, str]] = None, timeout: int = COMMAND_TIMEOUT):
+        """
+        home: HOME for the shell as seen from inside the sandbox.
+        sandbox_argv: command prefix (e.g. bwrap and its options) to run
+            the shell under, or None to run it directly.
+        env: environment for the shell process.
+        """
+        self.home = home
+        self.sandbox_argv = sandbox_argv or []
+        self.env = env
+        self.timeout = timeout
+
+    def run(self, commands: Sequence[str], cwd: Optional[str] = None) -> List[Tuple[int, str]]:
+        """Run commands in order and return (exit status, output) for each.
+
+        All commands share one shell process. A command that could not be
+        run reports exit status -1 and empty output.
+        """
+        if not commands:
+            return []
+
+        marker = f"__terminal_fun_{uuid.uuid4().hex}__"
+        argv = self.sandbox_argv + [
+            "/bin/bash", "-c", _BATCH_SCRIPT, "terminal-fun-verify",
+            cwd or self.home, marker, str(self.timeout), *commands
+        ]
+        try:
+            result = subprocess.run(
+                argv,
+                env=self.env,
+                capture_output=True,
+                text=True,
+                errors='replace',
+                timeout=self.timeout * len(commands) + 5
+            )
+            stdout = result.stdout
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+            return [(-1, '')] * len(commands)
+
+        # Walk the output sequentially to pair each output with its status
+        results = []
+        rest = stdout
+        for _ in commands:
+            head, sep, tail = rest.partition(f"\n{marker} ")
+            if not sep:
+                results.append((-1, ''))
+                continue
+            status_line, _, rest = tail.partition('\n')
+            try:
+                status = int(status_line.strip())
+            except ValueError:
+                status = -1
+            results.append((status, head))
+        return results
+
+
+class ExerciseVerifier:
+    """Evaluates exercise verify specs without blocking the caller."""
+
+    def __init__(self, virtual_home: str, display_home: Optional[str] = None,
+                 runner: Optional[CommandRunner] = None):
+        """
+        virtual_home: host path of the learner's virtual home.
+        display_home: path of the home directory inside the sandbox
+            (defaults to virtual_home when no sandbox is used).
+        runner: runs command_output checks; they fail without one.
+        """
+        self.virtual_home = os.path.normpath(virtual_home)
+        self.display_home = os.path.normpath(display_home or virtual_home)
+        # The sandbox gives the learner a private /tmp the host cannot see
+        self.sandboxed = display_home is not None
+        self.runner = runner
+
+    def expand_path(self, path: str) -> str:
+        """Expand ~ in a spec path to the home directory inside the sandbox."""
+        if path == '~' or path.startswith('~/'):
+            path = self.display_home + path[1:]
+        return os.path.normpath(path)
+
+    def host_paths(self, path: str) -> List[str]:
+        """Host-side locations that a sandbox path may correspond to."""
+        path = self.expand_path(path)
+        candidates = []
+        if path == self.display_home or path.startswith(self.display_home + '/'):
+            candidates.append(self.virtual_home + path[len(self.display_home):])
+        elif path == '/tmp' or path.startswith('/tmp/'):
+            # The mock sudo creates /tmp directories under ~/.sandbox_tmp
+            candidates.append(os.path.join(self.virtual_home, '.sandbox_tmp', path[len('/tmp/'):]))
+            if not self.sandboxed:
+                candidates.append(path)
+        else:
+            candidates.append(path)
+        return candidates
+
+    def display_path(self, path: str) -> str:
+        """Translate a host path inside the virtual home to its sandbox path."""
+        path = os.path.normpath(path)
+        if path == self.virtual_home or path.startswith(self.virtual_home + '/'):
+            return self.display_home + path[len(self.virtual_home):]
+        return path
+
+    def check_spec(self, spec: Dict, cwd: Optional[str] = None) -> Optional[bool]:
+        """Evaluate a spec that needs no command, or None for command specs."""
+        spec_type = spec.get('type')
+        path = spec.get('path')
+        if spec_type == 'file_exists':
+            return bool(path) and any(os.path.isfile(p) for p in self.host_paths(str(path)))
+        if spec_type == 'directory_exists':
+            return bool(path) and any(os.path.isdir(p) for p in self.host_paths(str(path)))
+        if spec_type == 'current_directory':
+            if not path or not cwd:
+                return False
+            return self.display_path(cwd) == self.expand_path(str(path))
+        if spec_type == 'command_output':
+            return None
+        return False
+
+    def verify(self, exercises: Sequence[Tuple[int, Dict]],
+               cwd: Optional[str] = None) -> Dict[int, bool]:
+        """Verify (index, verify spec) pairs and return results by index.
+
+        File and directory checks are plain stats; all command checks run
+        in a single batched shell.
+        """
+        results: Dict[int, bool] = {}
+        commands: List[Tuple[int, Dict]] = []
+
+        for index, spec in exercises:
+            if not isinstance(spec, dict):
+                results[index] = False
+                continue
+            outcome = self.check_spec(spec, cwd)
+            if outcome is None:
+                commands.append((index, spec))
+            else:
+                results[index] = outcome
+
+        runnable = [(i, spec) for i, spec in commands if spec.get('command')]
+        for i, spec in commands:
+            if not spec.get('command'):
+                results[i] = False
+
+        if runnable:
+            if self.runner is None:
+                outputs = [(-1, '')] * len(runnable)
+            else:
+                shell_cwd = self.display_path(cwd) if cwd else None
+                outputs = self.runner.run([str(spec['command']) for _, spec in runnable], shell_cwd)
+            for (index, spec), (status, output) in zip(runnable, outputs):
+                expected = spec.get('contains')
+                if expected is not None:
+                    results[index] = status >= 0 and str(expected) in output
+                else:
+                    results[index] = status == 0
+
+        return results
+
+    def verify_async(self, executor: Executor, exercises: Sequence[Tuple[int, Dict]],
+                     cwd: Optional[str] = None,
+                     callback: Optional[Callable[[Dict[int, bool]], None]] = None) -> Future:
+        """Run verify() on executor; callback (if any) runs on the worker."""
+        future = executor.submit(self.verify, list(exercises), cwd)
+        if callback is not None:
+            future.add_done_callback(
+                lambda f: callback(f.result()) if not f.cancelled() and f.exception() is None else None
+            )
+        return future
+
+
+class PathSpecIndex:
+    """Pending file/directory specs indexed by the host paths they check.
+
+    Lets a filesystem watcher re-evaluate only the specs affected by a
+    change instead of every open exercise.
+    """
+
+    def __init__(self, verifier: ExerciseVerifier, exercises: Sequence[Tuple[int, Dict]]):
+        self.verifier = verifier
+        self._specs: Dict[int, Dict] = {
+            index: spec for index, spec in exercises
+            if isinstance(spec, dict) and spec.get('type') in PATH_TYPES and spec.get('path')
+        }
+        self._rebuild()
+
+    def _rebuild(self):
+        """Rebuild the sorted (host path, index) list used for prefix lookups."""
+        self._targets: List[Tuple[str, int]] = sorted(
+            (target, index)
+            for index, spec in self._specs.items()
+            for target in self.verifier.host_paths(str(spec['path']))
+        )
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def targets(self) -> Set[str]:
+        """Every host path some pending spec checks."""
+        return {target for target, _ in self._targets}
+
+    def affected(self, path: str) -> Set[int]:
+        """Indexes of specs whose target is path or lies below it."""
+        path = os.path.normpath(path)
+        indexes = set()
+        # path itself, then everything under path + '/': siblings such as
+        # path + '-old' sort between the two, so they are separate runs
+        pos = bisect.bisect_left(self._targets, (path, -1))
+        while pos < len(self._targets) and self._targets[pos][0] == path:
+            indexes.add(self._targets[pos][1])
+            pos += 1
+        prefix = path.rstrip('/') + '/'
+        pos = bisect.bisect_left(self._targets, (prefix, -1))
+        while pos < len(self._targets) and self._targets[pos][0].startswith(prefix):
+            indexes.add(self._targets[pos][1])
+            pos += 1
+        return indexes
+
+    def evaluate(self, indexes=None) -> Dict[int, bool]:
+        """Check the given specs (default: all) and drop the ones that pass."""
+        if indexes is None:
+            indexes = list(self._specs)
+        results = {
+            index: bool(self.verifier.check_spec(self._specs[index]))
+            for index in indexes if index in self._specs
+        }
+        passed = [index for index, ok in results.items() if ok]
+        if passed:
+            for index in passed:
+                del self._specs[index]
+            self._rebuild()
+        return results
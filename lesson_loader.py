@@ -3,40 +3,197 @@ Lesson loader for Terminal Fun.
 Loads lesson content from markdown files.
 """
 
+import json
 import os
 import yaml
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 
+# Bump when the structure of parsed lesson dicts changes
+CACHE_VERSION = 2
+
+# libyaml's loader when PyYAML was built with it; the catalog reads every
+# lesson's frontmatter at startup
+_FRONTMATTER_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def default_cache_file() -> Path:
+    """Location of the compiled lesson cache."""
+    return Path.home() / ".local" / "share" / "terminal-fun" / "lesson-cache.json"
+
+
+def describe_yaml_error(error: Exception) -> str:
+    """One-line description of a YAML parse error."""
+    problem = getattr(error, 'problem', None)
+    mark = getattr(error, 'problem_mark', None)
+    if problem and mark is not None:
+        return f"{problem} (line {mark.line + 1}, column {mark.column + 1})"
+    text = str(error).strip()
+    return text.splitlines()[0] if text else type(error).__name__
+
+
 class LessonLoader:
     """Loads and parses lesson content from markdown files."""
 
-    def __init__(self, lessons_dir: Optional[str] = None):
+    def __init__(self, lessons_dir: Optional[str] = None,
+                 cache_file: Optional[str] = None, use_cache: bool = True,
+                 load_catalog: bool = True):
         # Check environment variable first, then use provided dir, then fallback to "lessons"
         if lessons_dir is None:
             lessons_dir = os.environ.get('TERMINAL_FUN_LESSONS_DIR', 'lessons')
 
         self.lessons_dir = Path(lessons_dir)
+        # Compiled lesson cache: frontmatter, and the parsed lesson once it
+        # has been opened, keyed by "category/slug" and validated against
+        # each file's mtime and size
+        self.cache_file = Path(cache_file) if cache_file else default_cache_file()
+        self.use_cache = use_cache
+        self._compiled: Dict[str, Dict] = {}
+        self._cache_dirty = False
         self._lessons_cache: Dict[str, Dict[str, Dict]] = {}
-        self._load_all_lessons()
+        # Catalog built once at startup: ordered categories, ordered lesson
+        # records per category and slug -> position maps for O(1) navigation
+        self._categories: List[str] = []
+        self._catalog: Dict[str, List[Dict]] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+        self._category_positions: Dict[str, int] = {}
+        # Tools that only parse individual files skip the catalog scan
+        if load_catalog:
+            self._load_all_lessons()
     
     def _load_all_lessons(self):
-        """Load all lessons from the lessons directory."""
+        """Load all lessons from the lessons directory and build the catalog."""
         if not self.lessons_dir.exists():
             return
         
+        cached = self._read_compiled_cache()
+        cache_dirty = False
+        
         for category_dir in self.lessons_dir.iterdir():
             if category_dir.is_dir() and not category_dir.name.startswith('.'):
                 category = category_dir.name
                 self._lessons_cache[category] = {}
                 
-                for lesson_file in category_dir.glob("*.md"):
+                lessons = []
+                for lesson_file in sorted(category_dir.glob("*.md")):
                     lesson_slug = lesson_file.stem
-                    self._lessons_cache[category][lesson_slug] = None  # Lazy load
+                    key = f"{category}/{lesson_slug}"
+                    entry = self._get_compiled_entry(lesson_file, cached.get(key))
+                    if entry is None:
+                        continue
+                    if entry is not cached.get(key):
+                        cache_dirty = True
+                    self._compiled[key] = entry
+                    # Lesson bodies are parsed on first use (see load_lesson)
+                    if entry.get('lesson') is not None:
+                        self._lessons_cache[category][lesson_slug] = entry['lesson']
+                    lesson_meta = entry['metadata']
+                    if lesson_meta:
+                        lessons.append({
+                            'slug': lesson_slug,
+                            'title': lesson_meta.get('title', lesson_slug),
+                            'description': lesson_meta.get('description', ''),
+                            'order': lesson_meta.get('order', 999)
+                        })
+                
+                # Sort by order
+                lessons.sort(key=lambda x: x['order'])
+                self._catalog[category] = lessons
+                self._positions[category] = {
+                    lesson['slug']: i for i, lesson in enumerate(lessons)
+                }
+        
+        self._categories = self._order_categories(self._catalog.keys())
+        self._category_positions = {
+            category: i for i, category in enumerate(self._categories)
+        }
+        
+        # Drop entries for lessons that were removed since the last run
+        if cache_dirty or cached.keys() != self._compiled.keys():
+            self._write_compiled_cache()
     
-    def get_categories(self) -> List[str]:
-        """Get all available categories in pedagogical order."""
+    def _read_compiled_cache(self) -> Dict[str, Dict]:
+        """Read compiled lesson entries from the on-disk cache."""
+        if not self.use_cache or not self.cache_file.exists():
+            return {}
+        
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+        
+        # Entries are not tied to the lessons directory's path, which
+        # changes with every snap revision; mtime and size catch edits
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return {}
+        return data.get('lessons', {})
+    
+    def _write_compiled_cache(self):
+        """Atomically write the compiled lesson entries to the on-disk cache."""
+        if not self.use_cache:
+            return
+        
+        data = {
+            'version': CACHE_VERSION,
+            'lessons': self._compiled
+        }
+        tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, separators=(',', ':'), default=str)
+            os.replace(tmp_file, self.cache_file)
+            self._cache_dirty = False
+        except (IOError, OSError) as e:
+            print(f"Warning: Could not write lesson cache: {e}")
+
+    def save_cache(self):
+        """Write lessons parsed since startup to the on-disk cache."""
+        if self._cache_dirty:
+            self._write_compiled_cache()
+    
+    def _get_compiled_entry(self, lesson_file: Path, cached: Optional[Dict]) -> Optional[Dict]:
+        """Return the compiled entry for a lesson file, re-reading it if stale.
+
+        Only the frontmatter is parsed here; the catalog needs nothing else.
+        """
+        try:
+            stat = lesson_file.stat()
+        except OSError:
+            return None
+        
+        if (cached is not None and
+            cached.get('mtime_ns') == stat.st_mtime_ns and
+            cached.get('size') == stat.st_size):
+            return cached
+        
+        category = lesson_file.parent.name
+        lesson_slug = lesson_file.stem
+        entry = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'metadata': {}
+        }
+        
+        try:
+            content = lesson_file.read_text()
+        except (IOError, UnicodeDecodeError) as e:
+            print(f"Error loading lesson {category}/{lesson_slug}: {e}")
+            return entry
+        
+        try:
+            frontmatter, _ = self._split_frontmatter(content)
+            if frontmatter:
+                entry['metadata'] = yaml.load(frontmatter, Loader=_FRONTMATTER_LOADER)
+        except Exception:
+            pass
+        
+        return entry
+    
+    def _order_categories(self, categories) -> List[str]:
+        """Sort category names into pedagogical order."""
         # Define the natural learning progression for complete beginners
         preferred_order = [
             'intro',           # Getting started with the terminal
@@ -51,7 +208,7 @@ class LessonLoader:
         ]
 
         # Get all available categories
-        available = set(self._lessons_cache.keys())
+        available = set(categories)
 
         # Return in preferred order, followed by any categories not in the list
         ordered = [cat for cat in preferred_order if cat in available]
@@ -59,6 +216,10 @@ class LessonLoader:
 
         return ordered + remaining
     
+    def get_categories(self) -> List[str]:
+        """Get all available categories in pedagogical order."""
+        return list(self._categories)
+    
     def get_category_display_name(self, category: str) -> str:
         """Get a human-readable name for a category."""
         # Convert directory name to display name
@@ -66,71 +227,116 @@ class LessonLoader:
 
     def get_lessons(self, category: str) -> List[Dict]:
         """Get all lessons in a category."""
-        if category not in self._lessons_cache:
-            return []
-        
-        lessons = []
-        category_dir = self.lessons_dir / category
-        
-        for lesson_file in category_dir.glob("*.md"):
-            lesson_slug = lesson_file.stem
-            lesson_meta = self._load_lesson_metadata(category, lesson_slug)
-            if lesson_meta:
-                lessons.append({
-                    'slug': lesson_slug,
-                    'title': lesson_meta.get('title', lesson_slug),
-                    'description': lesson_meta.get('description', ''),
-                    'order': lesson_meta.get('order', 999)
-                })
-        
-        # Sort by order
-        lessons.sort(key=lambda x: x['order'])
-        return lessons
+        return [dict(lesson) for lesson in self._catalog.get(category, [])]
+    
+    def get_lesson_index(self, category: str, lesson_slug: str) -> int:
+        """Get the position of a lesson within its category, or -1."""
+        return self._positions.get(category, {}).get(lesson_slug, -1)
+    
+    def get_lesson_count(self, category: str) -> int:
+        """Get the number of lessons in a category."""
+        return len(self._catalog.get(category, []))
+    
+    def get_adjacent_lesson(self, category: str, lesson_slug: str, offset: int) -> Optional[str]:
+        """Get the slug of the lesson `offset` positions away in the same category."""
+        index = self.get_lesson_index(category, lesson_slug)
+        if index < 0:
+            return None
+        target = index + offset
+        lessons = self._catalog[category]
+        if 0 <= target < len(lessons):
+            return lessons[target]['slug']
+        return None
+    
+    def get_next_category(self, category: str) -> Optional[Tuple[str, str]]:
+        """Get the category after `category` and its first lesson slug.
+
+        Returns (category, first_lesson_slug) or None if there is no next
+        category or it has no lessons.
+        """
+        index = self._category_positions.get(category)
+        if index is None:
+            return None
+        if index < len(self._categories) - 1:
+            next_category = self._categories[index + 1]
+            next_lessons = self._catalog.get(next_category)
+            if next_lessons:
+                return (next_category, next_lessons[0]['slug'])
+        return None
     
     def load_lesson(self, category: str, lesson_slug: str) -> Optional[Dict]:
         """Load a complete lesson."""
         # Check cache first
-        if (category in self._lessons_cache and 
-            lesson_slug in self._lessons_cache[category] and
-            self._lessons_cache[category][lesson_slug] is not None):
-            return self._lessons_cache[category][lesson_slug]
+        cached = self.get_cached_lesson(category, lesson_slug)
+        if cached is not None:
+            return cached
         
+        lesson_data, signature = self.read_lesson(category, lesson_slug)
+        if lesson_data is not None:
+            self.cache_lesson(category, lesson_slug, lesson_data, signature)
+        return lesson_data
+    
+    def get_cached_lesson(self, category: str, lesson_slug: str) -> Optional[Dict]:
+        """Get a lesson from the in-memory cache without touching the disk."""
+        return self._lessons_cache.get(category, {}).get(lesson_slug)
+    
+    def cache_lesson(self, category: str, lesson_slug: str, lesson_data: Dict,
+                     signature: Optional[Tuple[int, int]] = None):
+        """Store a parsed lesson in the in-memory cache.
+
+        It is also kept for the on-disk cache (written by save_cache) if
+        the file has not changed since the catalog was built. signature is
+        the (mtime_ns, size) from read_lesson(); without it the file is
+        stat'ed here.
+        """
+        if category not in self._lessons_cache:
+            self._lessons_cache[category] = {}
+        self._lessons_cache[category][lesson_slug] = lesson_data
+
+        entry = self._compiled.get(f"{category}/{lesson_slug}")
+        if entry is None or not self.use_cache:
+            return
+        if signature is None:
+            try:
+                stat = (self.lessons_dir / category / f"{lesson_slug}.md").stat()
+            except OSError:
+                return
+            signature = (stat.st_mtime_ns, stat.st_size)
+        if (entry['mtime_ns'], entry['size']) == tuple(signature):
+            entry['lesson'] = lesson_data
+            self._cache_dirty = True
+    
+    def parse_lesson(self, category: str, lesson_slug: str) -> Optional[Dict]:
+        """Read and parse a lesson file without caching the result.
+
+        This does not touch any loader state, so it is safe to call from a
+        worker thread.
+        """
+        return self.read_lesson(category, lesson_slug)[0]
+
+    def read_lesson(self, category: str, lesson_slug: str
+                    ) -> Tuple[Optional[Dict], Optional[Tuple[int, int]]]:
+        """parse_lesson() plus the (mtime_ns, size) of the file it read.
+
+        Hand both to cache_lesson() so it does not have to stat the file
+        again; like parse_lesson() this is safe on a worker thread.
+        """
         lesson_file = self.lessons_dir / category / f"{lesson_slug}.md"
         
-        if not lesson_file.exists():
-            return None
+        try:
+            stat = lesson_file.stat()
+        except OSError:
+            return None, None
         
         try:
             content = lesson_file.read_text()
             lesson_data = self._parse_lesson_markdown(content)
             lesson_data['slug'] = lesson_slug
             lesson_data['category'] = category
-            
-            # Cache it
-            if category not in self._lessons_cache:
-                self._lessons_cache[category] = {}
-            self._lessons_cache[category][lesson_slug] = lesson_data
-            
-            return lesson_data
+            return lesson_data, (stat.st_mtime_ns, stat.st_size)
         except Exception as e:
             print(f"Error loading lesson {category}/{lesson_slug}: {e}")
-            return None
-    
-    def _load_lesson_metadata(self, category: str, lesson_slug: str) -> Optional[Dict]:
-        """Load just the metadata (frontmatter) of a lesson."""
-        lesson_file = self.lessons_dir / category / f"{lesson_slug}.md"
-        
-        if not lesson_file.exists():
-            return None
-        
-        try:
-            content = lesson_file.read_text()
-            frontmatter, _ = self._split_frontmatter(content)
-            if frontmatter:
-                return yaml.safe_load(frontmatter)
-            return {}
-        except Exception:
-            return {}
+            return None, None
     
     def _parse_lesson_markdown(self, content: str) -> Dict:
         """Parse a lesson markdown file into structured data."""
@@ -192,6 +398,7 @@ class LessonLoader:
             description_lines = []
             command = None
             verify = None
+            verify_error = None
             in_verify_block = False
             verify_lines = []
             
@@ -203,9 +410,16 @@ class LessonLoader:
                 if stripped.startswith('**Command:**'):
                     # Extract command
                     cmd_text = stripped.replace('**Command:**', '').strip()
+                    # A backtick-quoted command (e.g. a here document) may
+                    # continue until the line with the closing backtick
+                    if cmd_text.startswith('`') and (len(cmd_text) == 1 or not cmd_text.endswith('`')):
+                        while j + 1 < len(lines):
+                            j += 1
+                            cmd_text += '\n' + lines[j].rstrip()
+                            if cmd_text.endswith('`'):
+                                break
                     # Remove backticks if present
                     command = cmd_text.strip('`').strip()
-                    j += 1
                 elif stripped.startswith('**Verify:**'):
                     # Start collecting verify YAML
                     in_verify_block = True
@@ -230,8 +444,10 @@ class LessonLoader:
                     if verify_lines:
                         try:
                             verify = yaml.safe_load('\n'.join(verify_lines))
-                        except Exception:
-                            pass
+                        except Exception as e:
+                            # Kept for the lesson validator; the exercise
+                            # just has no automatic check
+                            verify_error = describe_yaml_error(e)
                     in_verify_block = False
                     verify_lines = []
                 elif not in_verify_block and stripped and not stripped.startswith('```'):
@@ -246,6 +462,8 @@ class LessonLoader:
                 'command': command,
                 'verify': verify
             }
+            if verify_error:
+                exercise['verify_error'] = verify_error
             sections['exercises'].append(exercise)
         
         return sections
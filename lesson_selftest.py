@@ -0,0 +1,337 @@
+"""
+Lesson self-test for Terminal Fun.
+Runs every exercise's command in a throwaway virtual home and checks that
+its Verify spec passes, without starting the GTK application.
+
+Usage: python3 lesson_selftest.py [LESSONS_DIR] [--jobs N] [--lesson CATEGORY/SLUG]
+                                 [--no-bwrap] [--no-sandbox]
+"""
+
+import argparse
+import os
+import select
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from exercise_verifier import CommandRunner, ExerciseVerifier
+from lesson_loader import LessonLoader
+from virtual_home import VirtualHome
+
+
+# Seconds an exercise command may run before the lesson is abandoned
+DEFAULT_TIMEOUT = 15
+
+# Lines of command output shown for a failing exercise
+OUTPUT_TAIL_LINES = 8
+
+# Full-screen programs that need a learner at the keyboard; a lesson is
+# only run up to its first exercise that starts one of them
+INTERACTIVE_PROGRAMS = {'vim', 'vi', 'nano', 'emacs', 'less', 'more', 'man', 'top', 'htop'}
+
+# Programs that signal or renice processes found by name or PID: outside
+# bwrap's PID namespace they would act on the host's processes
+PROCESS_CONTROL_PROGRAMS = {'kill', 'killall', 'pkill', 'renice', 'skill', 'snice'}
+
+
+def is_interactive(command: str) -> bool:
+    """Whether command starts a program that needs a terminal and a learner."""
+    try:
+        words = shlex.split(command, comments=True)
+    except ValueError:
+        return False
+    return bool(words) and os.path.basename(words[0]) in INTERACTIVE_PROGRAMS
+
+
+def controls_processes(command: str) -> bool:
+    """Whether command runs a program that signals or renices processes."""
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        words = list(lexer)
+    except ValueError:
+        # Cannot tell, so assume the worst
+        return True
+    return any(os.path.basename(word) in PROCESS_CONTROL_PROGRAMS for word in words)
+
+
+class ShellSession:
+    """A long-lived shell that runs a lesson's commands one after another.
+
+    Working directory, variables and aliases carry over between commands,
+    as they do for a learner typing into the terminal.
+    """
+
+    def __init__(self, argv: List[str], env: Dict[str, str], cwd: Optional[str] = None):
+        self.marker = f"__terminal_fun_{uuid.uuid4().hex}__".encode()
+        self._buffer = b''
+        self.process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=env,
+            cwd=cwd,
+            start_new_session=True
+        )
+        # Same shell setup the learner gets, minus the welcome banner
+        self._send('source ~/.bashrc >/dev/null 2>&1\nshopt -s expand_aliases\n')
+
+    def _send(self, script: str):
+        self.process.stdin.write(script.encode())
+        self.process.stdin.flush()
+
+    def run(self, command: str, timeout: float) -> Tuple[int, str, str]:
+        """Run command and return (exit status, output, working directory after it).
+
+        Raises TimeoutError if the command does not finish in time and
+        EOFError if it ends the shell.
+        """
+        # eval keeps a syntax error in the command from swallowing the marker
+        self._send(
+            f"eval -- {shlex.quote(command)} </dev/null\n"
+            f"printf '\\n%s %d %s\\n' {self.marker.decode()} \"$?\" \"$PWD\"\n"
+        )
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        needle = b'\n' + self.marker + b' '
+        while True:
+            start = self._buffer.find(needle)
+            if start >= 0:
+                end = self._buffer.find(b'\n', start + len(needle))
+                if end >= 0:
+                    output = self._buffer[:start].decode(errors='replace')
+                    status, _, cwd = self._buffer[start + len(needle):end].decode(errors='replace').partition(' ')
+                    self._buffer = self._buffer[end + 1:]
+                    return int(status), output, cwd
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"no result after {timeout:g}s")
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if ready:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise EOFError("the shell exited")
+                self._buffer += chunk
+
+    def close(self):
+        """Stop the shell and anything it left running in the background."""
+        try:
+            os.killpg(self.process.pid, 9)
+        except OSError:
+            pass
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+def run_lesson(lesson: Dict, work_dir: Path, bwrap_bin: Optional[str],
+               timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """Run one lesson's exercises in order in a fresh virtual home."""
+    key = f"{lesson['category']}/{lesson['slug']}"
+    result = {'key': key, 'exercises': [], 'error': None, 'skipped': None}
+    started = time.monotonic()
+
+    # No pretend download and install pauses: nobody is watching
+    home = VirtualHome(work_dir / key.replace('/', '--'), username="learner", time_scale=0)
+    home.setup()
+    if bwrap_bin:
+        sandbox_argv = home.build_sandbox_argv(bwrap_bin)
+        env = {"TERM": "dumb"}
+        shell_argv = sandbox_argv + ["--chdir", home.display_home, "/bin/bash", "--noprofile", "--norc"]
+        shell_cwd = None
+        runner = CommandRunner(home.display_home, sandbox_argv=sandbox_argv, env=env)
+        verifier = ExerciseVerifier(str(home.path), display_home=home.display_home, runner=runner)
+    else:
+        env = home.shell_environment()
+        env["TERM"] = "dumb"
+        shell_argv = ["/bin/bash", "--noprofile", "--norc"]
+        shell_cwd = str(home.path)
+        runner = CommandRunner(str(home.path), env=env)
+        verifier = ExerciseVerifier(str(home.path), runner=runner)
+
+    session = ShellSession(shell_argv, env, shell_cwd)
+    try:
+        for index, exercise in enumerate(lesson.get('exercises', [])):
+            outcome = {
+                'number': index + 1,
+                'title': exercise.get('title', ''),
+                'command': exercise.get('command'),
+                'passed': False,
+                'status': None,
+                'output': '',
+                'reason': None
+            }
+            result['exercises'].append(outcome)
+
+            spec = exercise.get('verify')
+            if not exercise.get('command'):
+                outcome['reason'] = "no command"
+                continue
+            if not isinstance(spec, dict):
+                outcome['reason'] = "no Verify spec"
+                continue
+
+            if is_interactive(exercise['command']):
+                # Later exercises build on what the learner does here
+                result['exercises'].pop()
+                result['skipped'] = f"exercise {index + 1} is interactive ({exercise['command']})"
+                break
+
+            try:
+                status, output, cwd = session.run(exercise['command'], timeout)
+            except (TimeoutError, EOFError) as e:
+                outcome['reason'] = f"command did not complete: {e}"
+                result['error'] = "stopped after an unfinished command"
+                break
+            outcome['status'] = status
+            outcome['output'] = output
+
+            outcome['passed'] = verifier.verify([(index, spec)], cwd).get(index, False)
+            if not outcome['passed']:
+                outcome['reason'] = f"{spec.get('type')} check failed"
+    finally:
+        session.close()
+
+    result['passed'] = result['error'] is None and all(e['passed'] for e in result['exercises'])
+    result['duration'] = time.monotonic() - started
+    return result
+
+
+def collect_lessons(lessons_dir: Path, only: Optional[List[str]] = None) -> List[Dict]:
+    """Parsed lessons in curriculum order, optionally limited to category/slug keys."""
+    loader = LessonLoader(str(lessons_dir), use_cache=False)
+    lessons = []
+    for category in loader.get_categories():
+        for entry in loader.get_lessons(category):
+            key = f"{category}/{entry['slug']}"
+            if only and key not in only and category not in only:
+                continue
+            lesson = loader.load_lesson(category, entry['slug'])
+            if lesson:
+                lessons.append(lesson)
+    return lessons
+
+
+def format_result(result: Dict) -> str:
+    """Human-readable report for one lesson."""
+    exercises = result['exercises']
+    passed = sum(1 for e in exercises if e['passed'])
+    if not result['passed']:
+        verdict = "FAIL"
+    elif result['skipped']:
+        verdict = "SKIP" if not exercises else "PART"
+    else:
+        verdict = "PASS"
+    lines = [f"{verdict} {result['key']} ({passed}/{len(exercises)} exercises, {result['duration']:.1f}s)"]
+    for exercise in exercises:
+        if exercise['passed']:
+            continue
+        lines.append(f"  exercise {exercise['number']}: {exercise['reason']}")
+        if exercise['command']:
+            lines.append(f"    $ {exercise['command'].splitlines()[0]}")
+        if exercise['status'] is not None:
+            lines.append(f"    exit status {exercise['status']}")
+        tail = exercise['output'].strip().splitlines()[-OUTPUT_TAIL_LINES:]
+        lines.extend(f"    | {line}" for line in tail)
+    if result['error']:
+        lines.append(f"  {result['error']}")
+    if result['skipped']:
+        lines.append(f"  stopped: {result['skipped']}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Run every Terminal Fun exercise and check it passes.")
+    parser.add_argument('lessons_dir', nargs='?',
+                        default=os.environ.get('TERMINAL_FUN_LESSONS_DIR', 'lessons'),
+                        help="lessons directory (default: $TERMINAL_FUN_LESSONS_DIR or ./lessons)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="lessons run at once (default: number of CPUs; always 1 without bwrap)")
+    parser.add_argument('-l', '--lesson', action='append', dest='lessons', metavar='CATEGORY[/SLUG]',
+                        help="only run these lessons or categories (repeatable)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f"seconds each command may run (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument('--no-bwrap', action='store_true',
+                        help="run shells directly in the virtual home even if bwrap works")
+    parser.add_argument('--no-sandbox', action='store_true',
+                        help="without bwrap, still run lessons that kill or renice processes "
+                             "(they act on the host's processes)")
+    parser.add_argument('--keep', action='store_true',
+                        help="keep the virtual homes for inspection")
+    args = parser.parse_args(argv)
+
+    lessons = collect_lessons(Path(args.lessons_dir), args.lessons)
+    if not lessons:
+        print("No lessons found")
+        return 1
+
+    work_dir = Path(tempfile.mkdtemp(prefix="terminal-fun-selftest-"))
+    bwrap_bin = None if args.no_bwrap else VirtualHome(work_dir).find_bwrap(use_cache=False)
+    print(f"Running {len(lessons)} lessons "
+          f"({'in bwrap' if bwrap_bin else 'without bwrap'}) in {work_dir}")
+
+    jobs = args.jobs or os.cpu_count() or 1
+    if not bwrap_bin and jobs > 1:
+        # Without a PID namespace, lessons that signal processes by name
+        # (kill $(pgrep sleep), killall sleep) would hit each other's
+        print("Running one lesson at a time: without bwrap lessons share the host's processes")
+        jobs = 1
+
+    unsafe = []
+    if not bwrap_bin and not args.no_sandbox:
+        unsafe = [
+            lesson for lesson in lessons
+            if any(controls_processes(e.get('command') or '') for e in lesson.get('exercises', []))
+        ]
+        for lesson in unsafe:
+            print(f"SKIP {lesson['category']}/{lesson['slug']}: kills or renices processes, "
+                  f"which needs bwrap's PID namespace (--no-sandbox runs it on the host)")
+        lessons = [lesson for lesson in lessons if lesson not in unsafe]
+
+    failed = skipped = 0
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(run_lesson, lesson, work_dir, bwrap_bin, args.timeout)
+                for lesson in lessons
+            ]
+            # Report in curriculum order
+            for lesson, future in zip(lessons, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Setting up the virtual home or starting the shell failed
+                    result = {
+                        'key': f"{lesson['category']}/{lesson['slug']}",
+                        'exercises': [], 'skipped': None, 'passed': False, 'duration': 0.0,
+                        'error': f"could not run the lesson: {type(e).__name__}: {e}"
+                    }
+                failed += not result['passed']
+                skipped += bool(result['passed'] and result['skipped'])
+                print(format_result(result))
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    not_run = f", {len(unsafe)} not run without bwrap" if unsafe else ""
+    print(f"{len(lessons) - failed - skipped} passed, {skipped} stopped at an interactive "
+          f"exercise, {failed} failed{not_run} ({time.monotonic() - started:.1f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
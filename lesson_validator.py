@@ -0,0 +1,205 @@
+"""
+Lesson validator for Terminal Fun.
+Checks every lesson file for problems without starting the GTK application.
+
+Usage: python3 lesson_validator.py [LESSONS_DIR] [--jobs N] [--strict]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import yaml
+
+from exercise_verifier import PATH_TYPES, SUPPORTED_TYPES
+from lesson_loader import LessonLoader, describe_yaml_error
+
+
+# Fields each verify type needs besides 'type'
+REQUIRED_VERIFY_FIELDS = {
+    'command_output': ('command',),
+    'file_exists': ('path',),
+    'directory_exists': ('path',),
+    'current_directory': ('path',),
+}
+
+
+class LessonIssue(NamedTuple):
+    """A problem found in a lesson file."""
+    path: str
+    severity: str  # 'error' or 'warning'
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.severity}: {self.message}"
+
+
+# Parser used by each worker process; it never scans the lessons directory
+_parser: Optional[LessonLoader] = None
+
+
+def find_lesson_files(lessons_dir: Path) -> List[Path]:
+    """Lesson files in the same categories and order LessonLoader uses."""
+    if not lessons_dir.is_dir():
+        return []
+    files = []
+    for category_dir in sorted(lessons_dir.iterdir()):
+        if category_dir.is_dir() and not category_dir.name.startswith('.'):
+            files.extend(sorted(category_dir.glob("*.md")))
+    return files
+
+
+def check_verify_spec(verify) -> List[str]:
+    """Problems with a single exercise's verify spec."""
+    if not isinstance(verify, dict):
+        return [f"Verify spec must be a mapping, not {type(verify).__name__}"]
+    spec_type = verify.get('type')
+    if spec_type not in SUPPORTED_TYPES:
+        return [f"unknown verify type {spec_type!r} (expected one of {', '.join(SUPPORTED_TYPES)})"]
+    problems = []
+    for field in REQUIRED_VERIFY_FIELDS.get(spec_type, ()):
+        if field in verify and verify[field] is None:
+            # YAML reads a bare ~ as null
+            problems.append(f"'{field}' is null; quote it (\"~\") if you mean the home directory")
+        elif not verify.get(field):
+            problems.append(f"{spec_type} spec is missing '{field}'")
+    if spec_type in PATH_TYPES and 'contains' in verify:
+        problems.append(f"'contains' has no effect on {spec_type} specs")
+    return problems
+
+
+def check_lesson_file(path: str) -> Dict:
+    """Validate one lesson file.
+
+    Returns the lesson's category, its order (or None) and the issues found.
+    """
+    global _parser
+    if _parser is None:
+        _parser = LessonLoader(use_cache=False, load_catalog=False)
+
+    lesson_file = Path(path)
+    result = {'path': path, 'category': lesson_file.parent.name, 'order': None, 'issues': []}
+    issues = result['issues']
+
+    def report(severity: str, message: str):
+        issues.append(LessonIssue(path, severity, message))
+
+    try:
+        content = lesson_file.read_text()
+    except (IOError, UnicodeDecodeError) as e:
+        report('error', f"could not read lesson: {e}")
+        return result
+
+    frontmatter, _ = _parser._split_frontmatter(content)
+    if frontmatter is None:
+        report('error', "missing YAML frontmatter; the lesson will not be listed")
+        return result
+    try:
+        metadata = yaml.safe_load(frontmatter)
+    except yaml.YAMLError as e:
+        report('error', f"malformed frontmatter: {describe_yaml_error(e)}")
+        return result
+    if not isinstance(metadata, dict) or not metadata:
+        report('error', "frontmatter must be a non-empty mapping; the lesson will not be listed")
+        return result
+
+    if not metadata.get('title'):
+        report('warning', "frontmatter has no title")
+    if not metadata.get('description'):
+        report('warning', "frontmatter has no description")
+    order = metadata.get('order')
+    if order is None:
+        report('warning', "frontmatter has no order; the lesson is sorted last")
+    elif isinstance(order, bool) or not isinstance(order, (int, float)):
+        report('error', f"order must be a number, not {order!r}")
+    else:
+        result['order'] = order
+
+    try:
+        lesson = _parser._parse_lesson_markdown(content)
+    except Exception as e:
+        report('error', f"could not parse lesson: {e}")
+        return result
+
+    if not lesson.get('instructions'):
+        report('warning', "lesson has no instructions")
+    for number, exercise in enumerate(lesson.get('exercises', []), 1):
+        where = f"exercise {number}"
+        if not exercise.get('command'):
+            report('error', f"{where} has no **Command:**")
+        if exercise.get('verify_error'):
+            report('error', f"{where}: Verify block is not valid YAML: {exercise['verify_error']}")
+        elif exercise.get('verify') is None:
+            report('warning', f"{where} has no **Verify:** spec and cannot be checked")
+        else:
+            for problem in check_verify_spec(exercise['verify']):
+                report('error', f"{where}: {problem}")
+    return result
+
+
+def check_duplicate_orders(results: List[Dict]) -> List[LessonIssue]:
+    """Report lessons in the same category that share an order value."""
+    seen: Dict[tuple, str] = {}
+    issues = []
+    for result in results:
+        if result['order'] is None:
+            continue
+        key = (result['category'], result['order'])
+        if key in seen:
+            issues.append(LessonIssue(
+                result['path'], 'error',
+                f"order {result['order']} is also used by {seen[key]}"
+            ))
+        else:
+            seen[key] = result['path']
+    return issues
+
+
+def validate_lessons(lessons_dir: Path, jobs: Optional[int] = None) -> List[LessonIssue]:
+    """Validate every lesson under lessons_dir, parsing files in parallel."""
+    files = [str(path) for path in find_lesson_files(lessons_dir)]
+    if not files:
+        return [LessonIssue(str(lessons_dir), 'error', "no lessons found")]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(files) < 2 * jobs:
+        results = [check_lesson_file(path) for path in files]
+    else:
+        chunksize = max(1, len(files) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(check_lesson_file, files, chunksize=chunksize))
+
+    issues = [issue for result in results for issue in result['issues']]
+    issues.extend(check_duplicate_orders(results))
+    return issues
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Check Terminal Fun lessons for problems.")
+    parser.add_argument('lessons_dir', nargs='?',
+                        default=os.environ.get('TERMINAL_FUN_LESSONS_DIR', 'lessons'),
+                        help="lessons directory (default: $TERMINAL_FUN_LESSONS_DIR or ./lessons)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument('--strict', action='store_true',
+                        help="treat warnings as errors")
+    args = parser.parse_args(argv)
+
+    lessons_dir = Path(args.lessons_dir)
+    issues = validate_lessons(lessons_dir, args.jobs)
+    for issue in sorted(issues):
+        print(issue)
+
+    errors = sum(1 for issue in issues if issue.severity == 'error')
+    warnings = len(issues) - errors
+    print(f"{len(find_lesson_files(lessons_dir))} lessons checked: "
+          f"{errors} error(s), {warnings} warning(s)")
+    return 1 if errors or (args.strict and warnings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
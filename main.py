@@ -13,11 +13,122 @@ gi.require_version('Gdk', '4.0')
 from gi.repository import Gtk, Adw, Vte, GLib, Pango, Gio, GObject, Gdk
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
 from lesson_loader import LessonLoader
-from progress_tracker import ProgressTracker
+from markdown_renderer import RenderCache, markdown_to_pango
+from exercise_verifier import (
+    PATH_TYPES, CommandRunner, ExerciseVerifier, PathSpecIndex, commands_match,
+    is_read_only_command, read_only_part
+)
+from virtual_home import VirtualHome
+from progress_tracker import ProgressTracker, SQLiteProgressTracker, migrate_stray_progress
+
+
+# Terminal properties set by the learner's shell (see the generated .bashrc)
+# after every command; "seq" changes last and signals a complete report
+TERMPROP_COMMAND = "vte.ext.terminalfun.command"
+TERMPROP_STATUS = "vte.ext.terminalfun.status"
+TERMPROP_DURATION = "vte.ext.terminalfun.duration"
+TERMPROP_SEQ = "vte.ext.terminalfun.seq"
+
+
+def install_shell_termprops() -> bool:
+    """Register the shell integration termprops with VTE.
+
+    Must run before the first Vte.Terminal is created. Returns False when
+    VTE is too old to support termprops (before 0.78).
+    """
+    if not hasattr(Vte, "install_termprop"):
+        return False
+    try:
+        Vte.install_termprop(TERMPROP_COMMAND, Vte.PropertyType.STRING, Vte.PropertyFlags.NONE)
+        Vte.install_termprop(TERMPROP_STATUS, Vte.PropertyType.INT, Vte.PropertyFlags.NONE)
+        Vte.install_termprop(TERMPROP_DURATION, Vte.PropertyType.INT, Vte.PropertyFlags.NONE)
+        Vte.install_termprop(TERMPROP_SEQ, Vte.PropertyType.INT, Vte.PropertyFlags.NONE)
+    except (AttributeError, TypeError, GLib.Error) as e:
+        print(f"Warning: Could not install terminal properties: {e}")
+        return False
+    return True
+
+
+class ExerciseCard(Gtk.Frame):
+    """Reusable card widget showing a single exercise."""
+
+    def __init__(self):
+        super().__init__()
+        self.add_css_class("card")
+        self.set_margin_bottom(8)
+
+        exercise_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        exercise_box.set_margin_start(12)
+        exercise_box.set_margin_end(12)
+        exercise_box.set_margin_top(12)
+        exercise_box.set_margin_bottom(12)
+
+        # Exercise title with completion indicator on the right
+        title_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+
+        self.title_label = Gtk.Label()
+        self.title_label.add_css_class("heading")
+        self.title_label.set_halign(Gtk.Align.START)
+        self.title_label.set_hexpand(True)
+        title_row.append(self.title_label)
+
+        self.status_label = Gtk.Label(label="✓")
+        self.status_label.add_css_class("success")
+        self.status_label.set_halign(Gtk.Align.END)
+        self.status_label.set_tooltip_text("Exercise completed")
+        title_row.append(self.status_label)
+
+        exercise_box.append(title_row)
+
+        # Exercise description
+        self.desc_label = Gtk.Label()
+        self.desc_label.add_css_class("body")
+        self.desc_label.set_halign(Gtk.Align.START)
+        self.desc_label.set_wrap(True)
+        self.desc_label.set_selectable(True)
+        exercise_box.append(self.desc_label)
+
+        # Suggested command
+        self.cmd_frame = Gtk.Frame()
+        self.cmd_frame.add_css_class("code")
+        cmd_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        cmd_box.set_margin_start(8)
+        cmd_box.set_margin_end(8)
+        cmd_box.set_margin_top(4)
+        cmd_box.set_margin_bottom(4)
+
+        self.cmd_label = Gtk.Label()
+        self.cmd_label.add_css_class("monospace")
+        self.cmd_label.set_halign(Gtk.Align.START)
+        self.cmd_label.set_selectable(True)
+        cmd_box.append(self.cmd_label)
+
+        self.cmd_frame.set_child(cmd_box)
+        exercise_box.append(self.cmd_frame)
+
+        self.set_child(exercise_box)
+
+    def bind(self, exercise: dict, number: int, completed: bool = False):
+        """Show the given exercise in this card."""
+        self.title_label.set_text(f"Exercise {number}: {exercise.get('title', 'Untitled')}")
+        self.set_completed(completed)
+
+        description = exercise.get('description', '')
+        self.desc_label.set_text(description)
+        self.desc_label.set_visible(bool(description))
+
+        command = exercise.get('command')
+        self.cmd_label.set_text(f"💡 Try: {command}" if command else "")
+        self.cmd_frame.set_visible(bool(command))
+
+    def set_completed(self, completed: bool):
+        """Show or hide the completion checkmark."""
+        self.status_label.set_visible(completed)
 
 
 class LessonViewer(Gtk.Box):
@@ -32,6 +143,9 @@ class LessonViewer(Gtk.Box):
         self.set_vexpand(True)
         self.set_hexpand(True)
 
+        # Rendered instructions, so revisiting a lesson skips the renderer
+        self._render_cache = RenderCache()
+
         # Title
         self.title_label = Gtk.Label()
         self.title_label.add_css_class("title-1")
@@ -83,8 +197,16 @@ class LessonViewer(Gtk.Box):
         self.exercises_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
         self.append(self.exercises_box)
 
-    def display_lesson(self, lesson: dict):
-        """Display a lesson in the viewer."""
+        # Exercise cards are kept and rebound across lessons
+        self._exercise_cards: list[ExerciseCard] = []
+        self._exercise_count = 0
+
+    def display_lesson(self, lesson: dict, completed_exercises=()):
+        """Display a lesson in the viewer.
+
+        completed_exercises holds the (zero-based) indexes of exercises the
+        learner has already completed.
+        """
         # Clear previous content
         self.title_label.set_text(lesson.get('title', 'Untitled Lesson'))
         self.description_label.set_text(lesson.get('description', ''))
@@ -94,7 +216,8 @@ class LessonViewer(Gtk.Box):
         if instructions:
             # Convert markdown-style formatting to pango markup
             try:
-                instructions_html = self._markdown_to_pango(instructions)
+                cache_key = (lesson.get('category'), lesson.get('slug'))
+                instructions_html = self._render_cache.render(cache_key, instructions)
                 # Ensure markup is enabled
                 self.instructions_label.set_use_markup(True)
                 self.instructions_label.set_markup(instructions_html)
@@ -106,197 +229,102 @@ class LessonViewer(Gtk.Box):
             self.instructions_label.set_use_markup(False)
             self.instructions_label.set_text("")
 
-        # Clear exercises
-        while self.exercises_box.get_first_child():
-            self.exercises_box.remove(self.exercises_box.get_first_child())
-
-        # Add exercises
+        # Rebind pooled exercise cards instead of rebuilding them
         exercises = lesson.get('exercises', [])
         for idx, exercise in enumerate(exercises, 1):
-            self._add_exercise(exercise, idx)
-
-    def _add_exercise(self, exercise: dict, number: int):
-        """Add an exercise widget."""
-        exercise_frame = Gtk.Frame()
-        exercise_frame.add_css_class("card")
-        exercise_frame.set_margin_bottom(8)
-        
-        exercise_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
-        exercise_box.set_margin_start(12)
-        exercise_box.set_margin_end(12)
-        exercise_box.set_margin_top(12)
-        exercise_box.set_margin_bottom(12)
-
-        # Exercise title
-        title_label = Gtk.Label(label=f"Exercise {number}: {exercise.get('title', 'Untitled')}")
-        title_label.add_css_class("heading")
-        title_label.set_halign(Gtk.Align.START)
-        exercise_box.append(title_label)
-
-        # Exercise description
-        description = exercise.get('description', '')
-        if description:
-            desc_label = Gtk.Label()
-            desc_label.set_text(description)
-            desc_label.add_css_class("body")
-            desc_label.set_halign(Gtk.Align.START)
-            desc_label.set_wrap(True)
-            desc_label.set_selectable(True)
-            exercise_box.append(desc_label)
-
-        # Suggested command
-        command = exercise.get('command')
-        if command:
-            cmd_frame = Gtk.Frame()
-            cmd_frame.add_css_class("code")
-            cmd_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
-            cmd_box.set_margin_start(8)
-            cmd_box.set_margin_end(8)
-            cmd_box.set_margin_top(4)
-            cmd_box.set_margin_bottom(4)
-
-            cmd_label = Gtk.Label(label=f"💡 Try: {command}")
-            cmd_label.add_css_class("monospace")
-            cmd_label.set_halign(Gtk.Align.START)
-            cmd_label.set_selectable(True)
-            cmd_box.append(cmd_label)
-
-            cmd_frame.set_child(cmd_box)
-            exercise_box.append(cmd_frame)
-
-        exercise_frame.set_child(exercise_box)
-        self.exercises_box.append(exercise_frame)
+            if idx > len(self._exercise_cards):
+                card = ExerciseCard()
+                self._exercise_cards.append(card)
+                self.exercises_box.append(card)
+            card = self._exercise_cards[idx - 1]
+            card.bind(exercise, idx, (idx - 1) in completed_exercises)
+            card.set_visible(True)
+
+        # Hide cards left over from a lesson with more exercises
+        for card in self._exercise_cards[len(exercises):]:
+            card.set_visible(False)
+        self._exercise_count = len(exercises)
+
+    def set_exercise_completed(self, index: int, completed: bool):
+        """Update the checkmark of a displayed exercise (zero-based index)."""
+        if 0 <= index < self._exercise_count:
+            self._exercise_cards[index].set_completed(completed)
 
     def _markdown_to_pango(self, text: str) -> str:
         """Convert simple markdown to pango markup."""
-        import re
+        return markdown_to_pango(text)
+
+
+class VirtualHomeWatcher:
+    """Re-checks file and directory exercises when the virtual home changes.
+
+    Each pending spec's nearest existing ancestor directory is monitored
+    (inotify through Gio.FileMonitor). A change event only re-evaluates
+    the specs whose paths lie at or below the changed path.
+    """
+
+    def __init__(self, on_passed):
+        self.on_passed = on_passed  # called with the list of passed indexes
+        self.index: Optional[PathSpecIndex] = None
+        self._monitors: dict[str, Gio.FileMonitor] = {}
+
+    def watch(self, verifier: ExerciseVerifier, exercises):
+        """Start watching (index, spec) pairs; reports any already passing."""
+        self.index = PathSpecIndex(verifier, exercises)
+        results = self.index.evaluate()
+        self._rearm()
+        passed = sorted(i for i, ok in results.items() if ok)
+        if passed:
+            self.on_passed(passed)
+
+    def clear(self):
+        """Stop watching."""
+        self.index = None
+        self._rearm()
+
+    def _rearm(self):
+        """Monitor exactly the directories the pending specs depend on."""
+        needed = set()
+        if self.index is not None:
+            for target in self.index.targets():
+                directory = os.path.dirname(target)
+                while directory and not os.path.isdir(directory):
+                    directory = os.path.dirname(directory)
+                if directory:
+                    needed.add(directory)
+
+        for directory in list(self._monitors):
+            if directory not in needed:
+                self._monitors.pop(directory).cancel()
+
+        for directory in needed - self._monitors.keys():
+            try:
+                monitor = Gio.File.new_for_path(directory).monitor_directory(
+                    Gio.FileMonitorFlags.WATCH_MOVES, None
+                )
+            except GLib.Error:
+                continue
+            monitor.connect("changed", self._on_changed)
+            self._monitors[directory] = monitor
+
+    def _on_changed(self, monitor, file, other_file, event_type):
+        """Re-evaluate the specs affected by a change event."""
+        if self.index is None:
+            return
 
-        # Process in stages: handle patterns that contain other patterns first
-        # Use placeholders to protect processed content
+        indexes = set()
+        for changed in (file, other_file):
+            if changed is not None and changed.get_path():
+                indexes |= self.index.affected(changed.get_path())
+        if not indexes:
+            return
 
-        # Handle fenced code blocks ```code```
-        code_block_placeholders = []
-        code_block_idx = 0
-
-        def code_block_replacer(match):
-            nonlocal code_block_idx
-            # Group 1 is language (optional), group 2 is content
-            if match.lastindex >= 2:
-                lang = match.group(1) or ''
-                code_content = match.group(2)
-            else:
-                # Fallback if groups don't match as expected
-                lang = ''
-                code_content = match.group(0)[3:-3]  # Remove ``` from start and end
-            # Strip leading/trailing whitespace/newlines from code content
-            code_content = code_content.strip()
-            placeholder = f"___CODE_BLOCK_{code_block_idx}___"
-            # Escape the code content and wrap in monospace
-            escaped_code = GLib.markup_escape_text(code_content)
-            # Use <tt> for monospace
-            code_block_placeholders.append((placeholder, f'<tt>{escaped_code}</tt>'))
-            code_block_idx += 1
-            return placeholder
-
-        # Match code blocks - pattern: ```lang\ncontent\n```
-        # Use a simpler approach: match anything between triple backticks
-        def simple_code_block_replacer(m):
-            nonlocal code_block_idx
-            full_match = m.group(0)
-            # Remove the opening ``` and closing ```
-            content = full_match[3:-3]
-            # Split on first newline to separate language from content
-            parts = content.split('\n', 1)
-            if len(parts) > 1:
-                lang_part = parts[0].strip()
-                code_content = parts[1]
-            else:
-                lang_part = ''
-                code_content = parts[0]
-            code_content = code_content.strip()
-            placeholder = f"___CODE_BLOCK_{code_block_idx}___"
-            escaped_code = GLib.markup_escape_text(code_content)
-            code_block_placeholders.append((placeholder, f'<tt>{escaped_code}</tt>'))
-            code_block_idx += 1
-            return placeholder
-
-        text = re.sub(r'```[^`]*?```', simple_code_block_replacer, text, flags=re.DOTALL)
-
-        # Handle headings ### Heading
-        heading_placeholders = []
-        heading_idx = 0
-
-        def heading_replacer(match):
-            nonlocal heading_idx
-            level = len(match.group(1))  # Number of # characters
-            heading_text = match.group(2).strip()
-            placeholder = f"___HEADING_{heading_idx}___"
-            escaped_text = GLib.markup_escape_text(heading_text)
-            # Use different sizes based on level (### = h3, ## = h2, # = h1)
-            if level == 1:
-                heading_placeholders.append((placeholder, f'<span size="x-large" weight="bold">{escaped_text}</span>'))
-            elif level == 2:
-                heading_placeholders.append((placeholder, f'<span size="large" weight="bold">{escaped_text}</span>'))
-            else:  # level 3+
-                heading_placeholders.append((placeholder, f'<span size="medium" weight="bold">{escaped_text}</span>'))
-            heading_idx += 1
-            return placeholder
-        
-        text = re.sub(r'^(#{1,6})\s+(.+)$', heading_replacer, text, flags=re.MULTILINE)
-
-        # Handle **`code`** patterns (bold code) first
-        bold_code_placeholders = []
-        bold_code_idx = 0
-
-        def bold_code_replacer(match):
-            nonlocal bold_code_idx
-            code_text = match.group(1)
-            placeholder = f"___BOLD_CODE_{bold_code_idx}___"
-            escaped_code = GLib.markup_escape_text(code_text)
-            bold_code_placeholders.append((placeholder, f'<b><tt>{escaped_code}</tt></b>'))
-            bold_code_idx += 1
-            return placeholder
-
-        text = re.sub(r'\*\*`([^`\n]+)`\*\*', bold_code_replacer, text)
-
-        # Handle standalone code `code`
-        code_placeholders = []
-        code_idx = 0
-
-        def code_replacer(match):
-            nonlocal code_idx
-            code_text = match.group(1)
-            placeholder = f"___CODE_{code_idx}___"
-            escaped_code = GLib.markup_escape_text(code_text)
-            code_placeholders.append((placeholder, f'<tt>{escaped_code}</tt>'))
-            code_idx += 1
-            return placeholder
-
-        text = re.sub(r'`([^`\n]+)`', code_replacer, text)
-
-        # Handle standalone bold **text** (but not if it contains placeholders)
-        bold_placeholders = []
-        bold_idx = 0
-
-        def bold_replacer(match):
-            nonlocal bold_idx
-            bold_text = match.group(1)
-            placeholder = f"___BOLD_{bold_idx}___"
-            escaped_text = GLib.markup_escape_text(bold_text)
-            bold_placeholders.append((placeholder, f'<b>{escaped_text}</b>'))
-            bold_idx += 1
-            return placeholder
-
-        text = re.sub(r'\*\*([^*\n]+?)\*\*', bold_replacer, text)
-
-        # Escape remaining text (but not placeholders - they're safe)
-        text = GLib.markup_escape_text(text)
-
-        # Restore all placeholders with their HTML
-        for placeholder, html in (heading_placeholders + code_block_placeholders + bold_code_placeholders + code_placeholders + bold_placeholders):
-            text = text.replace(placeholder, html)
-
-        return text
+        results = self.index.evaluate(indexes)
+        # New directories may let us watch deeper, removed ones shallower
+        self._rearm()
+        passed = sorted(i for i, ok in results.items() if ok)
+        if passed:
+            self.on_passed(passed)
 
 
 class TerminalFunWindow(Adw.ApplicationWindow):
@@ -307,12 +335,43 @@ class TerminalFunWindow(Adw.ApplicationWindow):
         self.set_default_size(1200, 800)
 
         self.lesson_loader = LessonLoader()
-        self.progress_tracker = ProgressTracker()
+
+        # Per-user data directory (virtual home, sandbox, caches, progress)
+        self.data_dir = Path.home() / ".local" / "share" / "terminal-fun"
+
+        # Lab machines can share one SQLite progress database between
+        # learners; otherwise completions arrive in bursts from exercise
+        # verification and are collected into one append to the journal
+        progress_db = os.environ.get("TERMINAL_FUN_PROGRESS_DB")
+        if progress_db:
+            self.progress_tracker = SQLiteProgressTracker(
+                progress_db, learner=os.environ.get("TERMINAL_FUN_LEARNER")
+            )
+        else:
+            self.progress_tracker = ProgressTracker(
+                self.data_dir / "progress.json", write_delay=0.5, use_journal=True
+            )
+        # Fold in progress files older versions left in the working directory
+        migrate_stray_progress(self.progress_tracker)
         self.current_category: Optional[str] = None
         self.current_lesson_slug: Optional[str] = None
+        self.index_dialog: Optional[LessonIndexDialog] = None
+
+        # Worker pool for background work: terminal environment setup at
+        # startup, exercise checks and parsing the bodies of neighbouring
+        # lessons ahead of navigation
+        self._executor = ThreadPoolExecutor(
+            max_workers=2,
+            thread_name_prefix="terminal-fun-worker"
+        )
+        self._prefetch_pending: set[tuple[str, str]] = set()
+        self.connect("close-request", self._on_close_request)
 
-        # Set up virtual home directory for isolated terminal
-        self.virtual_home = self._setup_virtual_home()
+        # Virtual home, sandbox and bwrap are prepared off the main thread
+        # once the window is up (see _prepare_terminal)
+        self.home_setup = VirtualHome(self.data_dir)
+        self.virtual_home: Optional[str] = None
+        self.fake_home: Optional[str] = None
 
         # Header bar
         header = Adw.HeaderBar()
@@ -335,10 +394,17 @@ class TerminalFunWindow(Adw.ApplicationWindow):
         self.prev_button.connect("clicked", self.on_prev_clicked)
         header.pack_start(self.prev_button)
 
-        # Lesson title (center)
+        # Lesson title (center) with the current section's progress below
+        title_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        title_box.set_valign(Gtk.Align.CENTER)
         self.title_label = Gtk.Label(label="Terminal Fun")
         self.title_label.add_css_class("title")
-        header.set_title_widget(self.title_label)
+        title_box.append(self.title_label)
+        self.section_progress = Gtk.ProgressBar()
+        self.section_progress.add_css_class("osd")
+        self.section_progress.set_visible(False)
+        title_box.append(self.section_progress)
+        header.set_title_widget(title_box)
 
         # Next button (right side)
         self.next_content = Adw.ButtonContent()
@@ -405,6 +471,7 @@ class TerminalFunWindow(Adw.ApplicationWindow):
         right_pane.append(terminal_header)
 
         # VTE Terminal
+        self._shell_termprops = install_shell_termprops()
         self.terminal = Vte.Terminal()
         # Set font
         font = Pango.FontDescription()
@@ -420,62 +487,137 @@ class TerminalFunWindow(Adw.ApplicationWindow):
         key_controller.connect("key-pressed", self.on_terminal_key_pressed)
         self.terminal.add_controller(key_controller)
 
-        # Spawn shell with isolated environment
+        # Detect a sandboxed shell that dies right away (stale bwrap probe)
+        self._shell_bwrap: Optional[str] = None
+        self._shell_started_at = 0
+        self._bwrap_reprobed = False
+        self._shell_pid: Optional[int] = None
+        self.terminal.connect("child-exited", self._on_shell_exited)
+
+        # Exercise verification runs after the learner submits a command
+        # and the terminal output settles
+        self.exercise_verifier: Optional[ExerciseVerifier] = None
+        self.home_watcher = VirtualHomeWatcher(self._on_watched_exercises_passed)
+        self._watched_lesson: Optional[tuple[str, str]] = None
+        self._verification_running = False
+        self._verification_requested = False
+        self._command_submitted = False
+        self._verify_timeout_id = 0
+        self.terminal.connect("commit", self._on_terminal_commit)
+        self.terminal.connect("contents-changed", self._on_terminal_contents_changed)
+
+        # Shell integration: the .bashrc reports the working directory
+        # (OSC 7) and each finished command (termprops). Once reports
+        # arrive they replace the /proc lookup and the output debounce.
+        self._shell_cwd: Optional[str] = None
+        self._shell_reports_commands = False
+        self.last_shell_command: Optional[dict] = None
+        # Command not yet checked against command_output exercises: the
+        # shell's report, or {'command': None} after Enter without reports
+        self._command_to_verify: Optional[dict] = None
+        self.terminal.connect("current-directory-uri-changed", self._on_shell_cwd_changed)
+        if self._shell_termprops:
+            self.terminal.connect(f"termprop-changed::{TERMPROP_SEQ}", self._on_shell_command_reported)
+
+        terminal_scrolled = Gtk.ScrolledWindow()
+        terminal_scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        terminal_scrolled.set_child(self.terminal)
+        terminal_scrolled.set_hexpand(True)
+        terminal_scrolled.set_vexpand(True)
+
+        # Placeholder shown while the terminal environment is prepared
+        spinner = Gtk.Spinner()
+        spinner.set_size_request(32, 32)
+        spinner.start()
+        self.terminal_status = Adw.StatusPage()
+        self.terminal_status.set_title("Preparing terminal…")
+        self.terminal_status.set_description("Setting up your practice environment")
+        self.terminal_status.set_child(spinner)
+
+        self.terminal_stack = Gtk.Stack()
+        self.terminal_stack.set_hexpand(True)
+        self.terminal_stack.set_vexpand(True)
+        self.terminal_stack.add_named(self.terminal_status, "preparing")
+        self.terminal_stack.add_named(terminal_scrolled, "terminal")
+        self.terminal_stack.set_visible_child_name("preparing")
+        right_pane.append(self.terminal_stack)
+
+        # Pack panes
+        main_paned.set_start_child(left_pane)
+        main_paned.set_end_child(right_pane)
+        main_paned.set_position(600)  # Initial split position
+
+        # Content box
+        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        content_box.append(header)
+        content_box.append(main_paned)
+
+        # Toast overlay for notifications
+        self.toast_overlay = Adw.ToastOverlay()
+        self.toast_overlay.set_child(content_box)
+
+        self.set_content(self.toast_overlay)
+
+        # Load first lesson
+        GLib.idle_add(self.load_first_lesson)
+
+        # Prepare the virtual home and probe bwrap without blocking the window
+        self._prepare_terminal()
+
+    def _prepare_terminal(self):
+        """Set up the terminal environment on the worker pool.
+
+        The virtual home (and sandbox) and the bwrap probe are independent,
+        so they run in parallel; the shell is spawned once both finish.
+        """
+        self._terminal_setup = {
+            'home': self._executor.submit(self.home_setup.setup),
+            'bwrap': self._executor.submit(self.home_setup.find_bwrap),
+        }
+        for future in self._terminal_setup.values():
+            future.add_done_callback(
+                lambda f: GLib.idle_add(self._on_terminal_setup_progress)
+            )
+
+    def _on_terminal_setup_progress(self):
+        """Spawn the shell once every setup task has finished (main loop)."""
+        if self._terminal_setup is None:
+            return False
+        if not all(f.done() for f in self._terminal_setup.values()):
+            return False
+
+        home_future = self._terminal_setup['home']
+        bwrap_future = self._terminal_setup['bwrap']
+        self._terminal_setup = None
+
+        if home_future.cancelled() or bwrap_future.cancelled():
+            return False
+
+        error = home_future.exception()
+        if error is not None:
+            self.terminal_status.set_title("Terminal unavailable")
+            self.terminal_status.set_description(
+                f"Could not set up the practice environment: {error}"
+            )
+            self.terminal_status.set_child(None)
+            return False
+
+        self.virtual_home = home_future.result()
+        bwrap_bin = None if bwrap_future.exception() else bwrap_future.result()
+        self._spawn_shell(bwrap_bin)
+        self.terminal_stack.set_visible_child_name("terminal")
+        self.terminal.grab_focus()
+        return False
+
+    def _spawn_shell(self, bwrap_bin: Optional[str]):
+        """Spawn the learner's shell inside the virtual home."""
         # Try to use bubblewrap for namespace isolation (makes virtual home appear as /home/username)
         # Fall back to direct bash if bwrap is not available
-        username = os.environ.get("USER", "learner")
-        bwrap_bin = self._find_bwrap()
-
         if bwrap_bin:
             # Use bubblewrap for clean namespace isolation
-            fake_home = f"/home/{username}"
-
-            # Build the bwrap command with namespace isolation
-            # Note: --unshare-user is not used because snap confinement blocks
-            # access to /proc/sys/kernel/overflowuid required for user namespaces
-            argv = [
-                bwrap_bin,
-                "--unshare-pid",         # Create new PID namespace
-                "--unshare-uts",         # Create new UTS namespace (hostname)
-            ]
-
-            # Bind system directories read-only
-            system_dirs = ["/usr", "/bin", "/sbin", "/lib", "/lib64", "/etc"]
-            for sdir in system_dirs:
-                if os.path.exists(sdir):
-                    argv.extend(["--ro-bind", sdir, sdir])
-
-            # Bind /proc and /dev
-            argv.extend(["--proc", "/proc"])
-            argv.extend(["--dev", "/dev"])
-
-            # Create tmpfs for /tmp
-            argv.extend(["--tmpfs", "/tmp"])
-
-            # Bind virtual home to fake home path
-            argv.extend(["--bind", self.virtual_home, fake_home])
-
-            # Create /home directory structure
-            argv.extend(["--dir", "/home"])
-
-            # Bind sandbox bin to /opt/sandbox/bin for mock commands
-            if hasattr(self, 'sandbox_bin') and self.sandbox_bin:
-                argv.extend(["--dir", "/opt"])
-                argv.extend(["--dir", "/opt/sandbox"])
-                argv.extend(["--ro-bind", self.sandbox_bin, "/opt/sandbox/bin"])
-
-            # Set environment variables inside the sandbox
-            argv.extend(["--setenv", "HOME", fake_home])
-            argv.extend(["--setenv", "USER", username])
-            argv.extend(["--setenv", "SHELL", "/bin/bash"])
-            argv.extend(["--setenv", "TERM", os.environ.get("TERM", "xterm-256color")])
-
-            # Build PATH with sandbox bin first
-            if hasattr(self, 'sandbox_bin') and self.sandbox_bin:
-                sandbox_path = "/opt/sandbox/bin:/usr/local/bin:/usr/bin:/bin"
-            else:
-                sandbox_path = "/usr/local/bin:/usr/bin:/bin"
-            argv.extend(["--setenv", "PATH", sandbox_path])
+            fake_home = self.home_setup.display_home
+
+            argv = self.home_setup.build_sandbox_argv(bwrap_bin)
 
             # Set working directory and run bash
             argv.extend(["--chdir", fake_home])
@@ -489,27 +631,42 @@ class TerminalFunWindow(Adw.ApplicationWindow):
             # Store fake_home for bashrc generation
             self.fake_home = fake_home
             working_directory = None  # bwrap handles this with --chdir
+
+            # Verification commands run in their own short-lived sandbox
+            runner = CommandRunner(
+                fake_home,
+                sandbox_argv=self.home_setup.build_sandbox_argv(bwrap_bin),
+                env=env_dict
+            )
         else:
             # Fallback: direct bash without bwrap (paths will show real snap paths)
             shell = os.environ.get("SHELL", "/bin/bash")
             argv = [shell]
 
-            # Create custom environment for the virtual home
-            env_dict = dict(os.environ)
-            env_dict["HOME"] = self.virtual_home
-            env_dict["PWD"] = self.virtual_home
-
-            # Prepend sandbox bin to PATH for mock commands
-            if hasattr(self, 'sandbox_bin') and self.sandbox_bin:
-                current_path = env_dict.get("PATH", "/usr/bin:/bin")
-                env_dict["PATH"] = f"{self.sandbox_bin}:{current_path}"
+            # Custom environment for the virtual home, with mock commands
+            env_dict = self.home_setup.shell_environment()
 
             self.fake_home = None
             working_directory = self.virtual_home
 
+            runner = CommandRunner(self.virtual_home, env=env_dict)
+
+        self.exercise_verifier = ExerciseVerifier(
+            self.virtual_home,
+            display_home=self.fake_home,
+            runner=runner
+        )
+        # Re-arm the watcher with the new verifier on the next check
+        self._watched_lesson = None
+        self._shell_cwd = None
+        self._shell_reports_commands = False
+
         # Convert to list of "KEY=VALUE" strings for spawn_async
         envv = [f"{key}={value}" for key, value in env_dict.items()]
 
+        self._shell_bwrap = bwrap_bin
+        self._shell_started_at = GLib.get_monotonic_time()
+
         # Spawn the shell process using spawn_async
         # For VTE 3.91, spawn_async signature is:
         # spawn_async(pty_flags, working_directory, argv, envv, spawn_flags,
@@ -525,35 +682,80 @@ class TerminalFunWindow(Adw.ApplicationWindow):
             None,                  # child_setup_data
             -1,                    # timeout (-1 = no timeout)
             Gio.Cancellable(),     # cancellable
-            None,                  # callback (None = no callback, we'll check status differently)
+            self._on_shell_spawned,  # callback
             None                   # user_data
         )
 
-        terminal_scrolled = Gtk.ScrolledWindow()
-        terminal_scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
-        terminal_scrolled.set_child(self.terminal)
-        terminal_scrolled.set_hexpand(True)
-        terminal_scrolled.set_vexpand(True)
-        right_pane.append(terminal_scrolled)
+    def _on_shell_spawned(self, terminal, pid, error, user_data):
+        """Re-probe bwrap if the sandboxed shell could not be spawned."""
+        self._shell_pid = pid if error is None else None
+        if error is not None and self._shell_bwrap:
+            self._reprobe_bwrap_and_respawn()
+            return
+        self._verify_current_lesson()
 
-        # Pack panes
-        main_paned.set_start_child(left_pane)
-        main_paned.set_end_child(right_pane)
-        main_paned.set_position(600)  # Initial split position
+    def _get_shell_cwd(self) -> Optional[str]:
+        """Working directory of the learner's shell.
 
-        # Content box
-        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        content_box.append(header)
-        content_box.append(main_paned)
+        Uses the directory the shell last reported (OSC 7) and falls back
+        to reading /proc.
+        """
+        if self._shell_cwd:
+            return self._shell_cwd
 
-        # Toast overlay for notifications
-        self.toast_overlay = Adw.ToastOverlay()
-        self.toast_overlay.set_child(content_box)
+        pid = self._shell_pid
+        if not pid or pid < 0:
+            return None
 
-        self.set_content(self.toast_overlay)
+        # With bwrap the spawned process is bwrap itself; follow the chain
+        # of children down to the innermost bash
+        shell_pid = pid
+        current = pid
+        for _ in range(8):
+            try:
+                children = Path(f"/proc/{current}/task/{current}/children").read_text().split()
+            except OSError:
+                break
+            if not children:
+                break
+            current = int(children[0])
+            try:
+                if Path(f"/proc/{current}/comm").read_text().strip() == "bash":
+                    shell_pid = current
+            except OSError:
+                break
 
-        # Load first lesson
-        GLib.idle_add(self.load_first_lesson)
+        try:
+            return os.readlink(f"/proc/{shell_pid}/cwd")
+        except OSError:
+            return None
+
+    def _on_shell_exited(self, terminal, status):
+        """Re-probe bwrap if the sandboxed shell failed immediately."""
+        elapsed = GLib.get_monotonic_time() - self._shell_started_at
+        if self._shell_bwrap and status != 0 and elapsed < 2 * 1000000:
+            self._reprobe_bwrap_and_respawn()
+
+    def _reprobe_bwrap_and_respawn(self):
+        """Discard the cached bwrap probe, probe again and respawn the shell."""
+        if self._bwrap_reprobed:
+            return
+        self._bwrap_reprobed = True
+        self._shell_bwrap = None
+        self.home_setup.invalidate_bwrap_probe()
+        future = self._executor.submit(self.home_setup.find_bwrap, False)
+        future.add_done_callback(
+            lambda f: GLib.idle_add(self._on_bwrap_reprobed, f)
+        )
+
+    def _on_bwrap_reprobed(self, future):
+        """Spawn the shell again with the fresh probe result (main loop)."""
+        if future.cancelled():
+            return False
+        bwrap_bin = None if future.exception() else future.result()
+        self.terminal.reset(True, True)
+        self._spawn_shell(bwrap_bin)
+        return False
 
 
     def _setup_terminal_colors(self):
@@ -616,352 +818,6 @@ class TerminalFunWindow(Adw.ApplicationWindow):
         self.terminal.set_colors(foreground, background, palette)
         self.terminal.set_color_cursor(cursor)
 
-    def _setup_virtual_home(self) -> str:
-        """Set up an isolated virtual home directory for the terminal."""
-        # Create virtual home in user's local data directory
-        data_dir = Path.home() / ".local" / "share" / "terminal-fun"
-        virtual_home = data_dir / "virtual-home"
-
-        # Create the virtual home if it doesn't exist
-        virtual_home.mkdir(parents=True, exist_ok=True)
-
-        # Create realistic home directory structure
-        common_dirs = [
-            "Documents",
-            "Downloads",
-            "Pictures",
-            "Music",
-            "Videos",
-            "Desktop",
-            "workspace",
-            "projects"
-        ]
-
-        for dir_name in common_dirs:
-            (virtual_home / dir_name).mkdir(exist_ok=True)
-
-        # Create a welcome README in the home directory
-        readme_path = virtual_home / "README.txt"
-        if not readme_path.exists():
-            readme_content = """Welcome to Terminal Fun!
-
-This is your practice terminal environment. Everything you do here is isolated
-from your real home directory, so feel free to experiment!
-
-Try these commands to get started:
-  ls          - List files and directories
-  pwd         - Print working directory
-  cd Desktop  - Change to Desktop directory
-  mkdir test  - Create a new directory
-
-Happy learning!
-"""
-            readme_path.write_text(readme_content)
-
-        # Create .bashrc for realistic path display
-        bashrc_path = virtual_home / ".bashrc"
-        # Get the real username for display
-        real_user = os.environ.get("USER", "learner")
-        bashrc_content = f'''# Terminal Fun - Custom bash configuration
-# Makes the virtual home appear as /home/{real_user}
-
-# The real virtual home path (for internal use) - use canonical path
-export _REAL_HOME="$(cd "$HOME" && builtin pwd)"
-# The display home path (what users see)
-export _DISPLAY_HOME="/home/{real_user}"
-
-# Function to translate real paths to display paths
-_translate_path() {{
-    local path="$1"
-    # Handle both exact match and subdirectories
-    if [[ "$path" == "$_REAL_HOME"* ]]; then
-        echo "$_DISPLAY_HOME${{path#$_REAL_HOME}}"
-    else
-        echo "$path"
-    fi
-}}
-
-# Custom pwd that shows the translated path
-pwd() {{
-    local real_pwd
-    real_pwd=$(builtin pwd "$@")
-    _translate_path "$real_pwd"
-}}
-
-# Update prompt path before each command
-_update_prompt_pwd() {{
-    local display_pwd
-    display_pwd=$(_translate_path "$(builtin pwd)")
-    # Set prompt display (with ~ for home)
-    _PWD_DISPLAY="${{display_pwd/$_DISPLAY_HOME/\\~}}"
-}}
-
-# Run before each prompt
-PROMPT_COMMAND=_update_prompt_pwd
-
-# Set up the prompt - Ubuntu style (uses $_PWD_DISPLAY set by PROMPT_COMMAND)
-PS1='\\[\\033[01;32m\\]{real_user}@ubuntu\\[\\033[00m\\]:\\[\\033[01;34m\\]$_PWD_DISPLAY\\[\\033[00m\\]\\$ '
-
-# Color support for ls
-alias ls=\'ls --color=auto\'
-alias ll=\'ls -alF\'
-alias la=\'ls -A\'
-alias l=\'ls -CF\'
-
-# Color support for grep
-alias grep=\'grep --color=auto\'
-alias fgrep=\'fgrep --color=auto\'
-alias egrep=\'egrep --color=auto\'
-
-# Welcome message
-echo "Welcome to Terminal Fun!"
-echo "Your practice environment is ready at $_DISPLAY_HOME"
-echo ""
-'''
-        bashrc_path.write_text(bashrc_content)
-
-        # Create a .vimrc with syntax highlighting enabled
-        vimrc_path = virtual_home / ".vimrc"
-        if not vimrc_path.exists():
-            vimrc_content = r"""====================================================================
-" Terminal Fun Vim Configuration
-" Optimized for learning with syntax highlighting enabled
-====================================================================
-
-" Enable syntax highlighting
-syntax on
-
-" Enable file type detection and plugins
-filetype plugin indent on
-
-" Set color scheme (works well with Ubuntu terminal colors)
-set background=dark
-
-" Show line numbers
-set number
-
-" Highlight current line
-set cursorline
-
-" Enable mouse support (useful for beginners)
-set mouse=a
-
-" Tab settings
-set tabstop=4           " Tab width
-set shiftwidth=4        " Indent width
-set expandtab           " Use spaces instead of tabs
-set smartindent         " Auto-indent new lines
-
-" Search settings
-set ignorecase          " Ignore case in search
-set smartcase           " Unless search contains uppercase
-set hlsearch            " Highlight search results
-set incsearch           " Incremental search
-
-" Show matching brackets
-set showmatch
-
-" Enable auto-completion menu
-set wildmenu
-set wildmode=longest:full,full
-
-" Display settings
-set ruler               " Show cursor position
-set showcmd             " Show incomplete commands
-set laststatus=2        " Always show status line
-
-" Better backspace behavior
-set backspace=indent,eol,start
-
-" Keep more context when scrolling
-set scrolloff=5
-
-" Encoding
-set encoding=utf-8
-
-" Enable persistent undo
-set undofile
-set undodir=~/.vim/undodir
-
-" Syntax highlighting for specific languages
-" (These are automatically enabled when files are detected)
-" Supported: C, C++, Python, JavaScript, Java, C#, Zig, Rust, YAML, JSON
-
-" Language-specific settings
-autocmd FileType python setlocal tabstop=4 shiftwidth=4 expandtab
-autocmd FileType javascript setlocal tabstop=2 shiftwidth=2 expandtab
-autocmd FileType java setlocal tabstop=4 shiftwidth=4 expandtab
-autocmd FileType c,cpp setlocal tabstop=4 shiftwidth=4 expandtab
-autocmd FileType cs setlocal tabstop=4 shiftwidth=4 expandtab
-autocmd FileType rust setlocal tabstop=4 shiftwidth=4 expandtab
-autocmd FileType zig setlocal tabstop=4 shiftwidth=4 expandtab
-autocmd FileType yaml,yml setlocal tabstop=2 shiftwidth=2 expandtab
-autocmd FileType json setlocal tabstop=2 shiftwidth=2 expandtab
-
-" Visual feedback
-set visualbell          " Use visual bell instead of beeping
-
-" Status line (shows file type and position)
-set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
-
-" Welcome message for new users
-" Press 'i' to enter Insert mode, 'Esc' to return to Normal mode
-"""
-            vimrc_path.write_text(vimrc_content)
-
-        # Create .vim directory for undo history
-        vim_dir = virtual_home / ".vim" / "undodir"
-        vim_dir.mkdir(parents=True, exist_ok=True)
-
-        # Create .gitconfig with sensible defaults
-        gitconfig_path = virtual_home / ".gitconfig"
-        if not gitconfig_path.exists():
-            gitconfig_content = """[user]
-\tname = Terminal Fun Student
-\temail = student@terminalfun.local
-
-[init]
-\tdefaultBranch = main
-
-[core]
-\teditor = vim
-\tautocrlf = input
-
-[color]
-\tui = auto
-\tbranch = auto
-\tdiff = auto
-\tstatus = auto
-
-[color "branch"]
-\tcurrent = yellow reverse
-\tlocal = yellow
-\tremote = green
-
-[color "diff"]
-\tmeta = yellow bold
-\tfrag = magenta bold
-\told = red bold
-\tnew = green bold
-
-[color "status"]
-\tadded = green
-\tchanged = yellow
-\tuntracked = red
-
-[alias]
-\tst = status
-\tco = checkout
-\tbr = branch
-\tci = commit
-\tlog1 = log --oneline --graph --decorate
-\tlast = log -1 HEAD
-\tunstage = reset HEAD --
-
-[pull]
-\trebase = false
-
-[push]
-\tdefault = simple
-
-[help]
-\tautocorrect = 1
-"""
-            gitconfig_path.write_text(gitconfig_content)
-
-        # Set up sandbox for mock commands
-        self._setup_sandbox(data_dir)
-
-        return str(virtual_home)
-
-    def _find_bwrap(self) -> str | None:
-        """Find the bubblewrap (bwrap) binary, checking snap location first.
-
-        Returns the path to bwrap if found and functional, or None if not available
-        or if it cannot create user namespaces (e.g., blocked by snap confinement).
-        """
-        import shutil
-        import subprocess
-
-        bwrap_path = None
-
-        # Check if running in snap
-        snap_dir = os.environ.get("SNAP")
-        if snap_dir:
-            snap_bwrap = Path(snap_dir) / "usr" / "bin" / "bwrap"
-            if snap_bwrap.exists():
-                bwrap_path = str(snap_bwrap)
-
-        # Fall back to system bwrap
-        if not bwrap_path:
-            system_bwrap = shutil.which("bwrap")
-            if system_bwrap:
-                bwrap_path = system_bwrap
-
-        if not bwrap_path:
-            return None
-
-        # Test if bwrap can actually run with PID namespace isolation
-        # This may fail in snap confinement even if the binary exists
-        try:
-            result = subprocess.run(
-                [bwrap_path, "--unshare-pid", "--", "/bin/true"],
-                capture_output=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                return bwrap_path
-            # bwrap exists but can't create namespaces
-            return None
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
-            # bwrap failed to run properly
-            return None
-
-    def _setup_sandbox(self, data_dir: Path) -> None:
-        """Set up the sandbox with mock commands for privileged operations."""
-        import shutil
-
-        sandbox_dir = data_dir / "sandbox"
-        sandbox_bin = sandbox_dir / "bin"
-        sandbox_lib = sandbox_dir / "lib"
-        sandbox_state = sandbox_dir / "state"
-
-        # Create sandbox directories
-        sandbox_bin.mkdir(parents=True, exist_ok=True)
-        sandbox_lib.mkdir(parents=True, exist_ok=True)
-        sandbox_state.mkdir(parents=True, exist_ok=True)
-
-        # Find the source sandbox directory (in the app's installation)
-        # First, try relative to this script
-        script_dir = Path(__file__).parent
-        source_sandbox = script_dir / "sandbox"
-
-        # If running from snap, check snap location
-        if not source_sandbox.exists():
-            snap_dir = os.environ.get("SNAP")
-            if snap_dir:
-                source_sandbox = Path(snap_dir) / "sandbox"
-
-        if source_sandbox.exists():
-            # Copy sandbox scripts to user's sandbox directory
-            source_bin = source_sandbox / "bin"
-            source_lib = source_sandbox / "lib"
-
-            if source_bin.exists():
-                for script in source_bin.iterdir():
-                    dest = sandbox_bin / script.name
-                    shutil.copy2(script, dest)
-                    dest.chmod(0o755)
-
-            if source_lib.exists():
-                for lib_file in source_lib.iterdir():
-                    dest = sandbox_lib / lib_file.name
-                    shutil.copy2(lib_file, dest)
-                    dest.chmod(0o755)
-
-        # Store sandbox path for use in terminal setup
-        self.sandbox_bin = str(sandbox_bin)
-
     def load_first_lesson(self):
         """Load the first available lesson."""
         categories = self.lesson_loader.get_categories()
@@ -983,13 +839,256 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
 
         self.current_category = category
         self.current_lesson_slug = lesson_slug
-        self.lesson_viewer.display_lesson(lesson)
+        completed = {
+            i for i in range(len(lesson.get('exercises', [])))
+            if self.progress_tracker.get_exercise_status(category, lesson_slug, i) == 'completed'
+        }
+        self.lesson_viewer.display_lesson(lesson, completed)
 
         # Update headerbar title
         self.title_label.set_label(lesson.get('title', 'Terminal Fun'))
 
         self.update_navigation_buttons()
         self.update_complete_button()
+        self.update_section_progress()
+        self._prefetch_adjacent_lessons()
+        # A command run before the lesson was opened completes nothing in it
+        self._command_to_verify = None
+        self._verify_current_lesson()
+
+    def _on_shell_cwd_changed(self, terminal):
+        """Remember the working directory reported by the shell."""
+        uri = terminal.get_current_directory_uri()
+        if not uri:
+            self._shell_cwd = None
+            return
+        try:
+            self._shell_cwd = GLib.filename_from_uri(uri)[0]
+        except GLib.Error:
+            self._shell_cwd = None
+
+    def _get_termprop_int(self, name: str) -> Optional[int]:
+        """Integer termprop value, or None if unset."""
+        is_set, value = self.terminal.get_termprop_int(name)
+        return value if is_set else None
+
+    def _on_shell_command_reported(self, terminal, name):
+        """The shell finished a command: record it and verify right away."""
+        command = terminal.get_termprop_string(TERMPROP_COMMAND)
+        if isinstance(command, tuple):
+            command = command[0]
+        self.last_shell_command = {
+            'command': command or '',
+            'status': self._get_termprop_int(TERMPROP_STATUS),
+            'duration_ms': self._get_termprop_int(TERMPROP_DURATION),
+        }
+        self._command_to_verify = self.last_shell_command
+        self._shell_reports_commands = True
+
+        self._command_submitted = False
+        if self._verify_timeout_id:
+            GLib.source_remove(self._verify_timeout_id)
+            self._verify_timeout_id = 0
+        self._verify_current_lesson()
+
+    def _on_terminal_commit(self, terminal, text, size):
+        """Note when the learner presses Enter in the terminal."""
+        if self._shell_reports_commands:
+            # The shell tells us when the command has finished
+            return
+        if '\r' in text or '\n' in text:
+            self._command_submitted = True
+            self._schedule_verification()
+
+    def _on_terminal_contents_changed(self, terminal):
+        """Wait for a submitted command's output to settle before verifying."""
+        if self._command_submitted:
+            self._schedule_verification()
+
+    def _schedule_verification(self):
+        """(Re)arm the short delay before verifying exercises."""
+        if self._verify_timeout_id:
+            GLib.source_remove(self._verify_timeout_id)
+        self._verify_timeout_id = GLib.timeout_add(500, self._on_verify_timeout)
+
+    def _on_verify_timeout(self):
+        """Output has settled after a command: verify the open lesson."""
+        self._verify_timeout_id = 0
+        self._command_submitted = False
+        # Without shell reports all we know is that some command ran
+        self._command_to_verify = {'command': None, 'status': None}
+        self._verify_current_lesson()
+        return False
+
+    def _verify_current_lesson(self):
+        """Check the open lesson's pending exercises.
+
+        File and directory specs are handed to the virtual home watcher;
+        command and working directory specs run on the worker pool.
+        command_output specs are only checked after the learner runs a
+        command: the exercise's own one when the shell reports commands,
+        any one otherwise. Verify commands that could change files are not
+        re-run in the learner's home; the exercise passes when the
+        learner's own run succeeded, or by the read-only rest of the check.
+        """
+        if self.exercise_verifier is None or not self.current_lesson_slug:
+            return
+        if self._verification_running:
+            self._verification_requested = True
+            return
+
+        category = self.current_category
+        lesson_slug = self.current_lesson_slug
+        lesson = self.lesson_loader.get_cached_lesson(category, lesson_slug)
+        if not lesson:
+            return
+
+        exercises = lesson.get('exercises', [])
+        pending = [
+            (i, exercise['verify'])
+            for i, exercise in enumerate(exercises)
+            if isinstance(exercise.get('verify'), dict) and
+            self.progress_tracker.get_exercise_status(category, lesson_slug, i) != 'completed'
+        ]
+
+        watched = [(i, spec) for i, spec in pending if spec.get('type') in PATH_TYPES]
+        if self._watched_lesson != (category, lesson_slug):
+            self._watched_lesson = (category, lesson_slug)
+            self.home_watcher.watch(self.exercise_verifier, watched)
+
+        report, self._command_to_verify = self._command_to_verify, None
+        ran = report['command'] if report else None
+        if ran is not None:
+            # Exercises whose command the learner ran; a whole-line match
+            # wins over ones that only share the first command
+            expected = {
+                i: [c for c in (exercises[i].get('command'), spec.get('command')) if c]
+                for i, spec in pending if spec.get('type') == 'command_output'
+            }
+            matched = {i for i, commands in expected.items()
+                       if any(commands_match(ran, c, whole_line=True) for c in commands)}
+            if not matched:
+                matched = {i for i, commands in expected.items()
+                           if any(commands_match(ran, c) for c in commands)}
+
+        checks = []
+        trusted = []
+        for i, spec in pending:
+            if spec.get('type') in PATH_TYPES:
+                continue
+            if spec.get('type') == 'command_output':
+                if report is None:
+                    continue
+                command = str(spec.get('command') or '')
+                if ran is not None:
+                    if i not in matched:
+                        continue
+                    if not is_read_only_command(command):
+                        if report.get('status') == 0:
+                            trusted.append(i)
+                        continue
+                else:
+                    readable = read_only_part(command)
+                    if readable is None:
+                        continue
+                    spec = dict(spec, command=readable)
+            checks.append((i, spec))
+
+        self._record_passed_exercises(category, lesson_slug, trusted)
+        pending = checks
+        if not pending:
+            return
+
+        self._verification_running = True
+        future = self.exercise_verifier.verify_async(self._executor, pending, self._get_shell_cwd())
+        future.add_done_callback(
+            lambda f: GLib.idle_add(self._on_verification_done, category, lesson_slug, f)
+        )
+
+    def _on_verification_done(self, category, lesson_slug, future):
+        """Record exercises passed by a verification run (main loop)."""
+        self._verification_running = False
+        if not future.cancelled() and future.exception() is None:
+            passed = sorted(i for i, ok in future.result().items() if ok)
+            self._record_passed_exercises(category, lesson_slug, passed)
+
+        if self._verification_requested:
+            self._verification_requested = False
+            self._verify_current_lesson()
+        return False
+
+    def _on_watched_exercises_passed(self, passed):
+        """Record file/directory exercises reported by the watcher."""
+        if self._watched_lesson is not None:
+            self._record_passed_exercises(*self._watched_lesson, passed)
+
+    def _record_passed_exercises(self, category, lesson_slug, passed):
+        """Mark exercises complete and tell the learner."""
+        if not passed:
+            return
+        for index in passed:
+            self.progress_tracker.complete_exercise(category, lesson_slug, index)
+
+        if (category, lesson_slug) != (self.current_category, self.current_lesson_slug):
+            return
+        for index in passed:
+            self.lesson_viewer.set_exercise_completed(index, True)
+        if len(passed) == 1:
+            toast = Adw.Toast.new(f"Exercise {passed[0] + 1} complete!")
+        else:
+            numbers = ", ".join(str(i + 1) for i in passed)
+            toast = Adw.Toast.new(f"Exercises {numbers} complete!")
+        self.toast_overlay.add_toast(toast)
+
+    def _prefetch_adjacent_lessons(self):
+        """Parse the previous, next and next-section lessons in the background.
+
+        The catalog only reads frontmatter, so a lesson's body is parsed
+        the first time it is needed; doing it here keeps that off the
+        main thread when the learner moves on.
+        """
+        category = self.current_category
+        lesson_slug = self.current_lesson_slug
+        targets = []
+
+        for offset in (-1, 1):
+            slug = self.lesson_loader.get_adjacent_lesson(category, lesson_slug, offset)
+            if slug:
+                targets.append((category, slug))
+
+        next_section = self.get_next_section()
+        if next_section:
+            targets.append(next_section)
+
+        for target in targets:
+            if target in self._prefetch_pending:
+                continue
+            if self.lesson_loader.get_cached_lesson(*target) is not None:
+                continue
+            self._prefetch_pending.add(target)
+            future = self._executor.submit(self.lesson_loader.read_lesson, *target)
+            future.add_done_callback(
+                lambda f, t=target: GLib.idle_add(self._on_lesson_prefetched, t, f)
+            )
+
+    def _on_lesson_prefetched(self, target, future):
+        """Store a lesson parsed by the prefetcher (runs on the main loop)."""
+        self._prefetch_pending.discard(target)
+        if future.cancelled() or future.exception() is not None:
+            return False
+        # The worker also took the file's mtime and size: no stat here
+        lesson, signature = future.result()
+        if lesson is not None and self.lesson_loader.get_cached_lesson(*target) is None:
+            self.lesson_loader.cache_lesson(target[0], target[1], lesson, signature)
+        return False
+
+    def _on_close_request(self, window):
+        """Save progress and stop background work when the window closes."""
+        self.home_watcher.clear()
+        self.progress_tracker.close()
+        self.lesson_loader.save_cache()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return False
 
     def get_next_section(self) -> Optional[tuple[str, str]]:
         """Get the next section's category and first lesson slug.
@@ -999,32 +1098,22 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
         if not self.current_category:
             return None
 
-        categories = self.lesson_loader.get_categories()
-        try:
-            current_cat_index = categories.index(self.current_category)
-            if current_cat_index < len(categories) - 1:
-                next_category = categories[current_cat_index + 1]
-                next_lessons = self.lesson_loader.get_lessons(next_category)
-                if next_lessons:
-                    return (next_category, next_lessons[0]['slug'])
-        except ValueError:
-            pass
-        return None
+        return self.lesson_loader.get_next_category(self.current_category)
 
     def is_last_lesson_in_section(self) -> bool:
         """Check if current lesson is the last in its section."""
         if not self.current_category or not self.current_lesson_slug:
             return False
 
-        lessons = self.lesson_loader.get_lessons(self.current_category)
-        if not lessons:
+        count = self.lesson_loader.get_lesson_count(self.current_category)
+        if not count:
             return False
 
-        current_index = next(
-            (i for i, l in enumerate(lessons) if l['slug'] == self.current_lesson_slug),
-            -1
+        current_index = self.lesson_loader.get_lesson_index(
+            self.current_category,
+            self.current_lesson_slug
         )
-        return current_index == len(lessons) - 1
+        return current_index == count - 1
 
     def update_navigation_buttons(self):
         """Update prev/next button states."""
@@ -1033,21 +1122,21 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
             self.next_button.set_sensitive(False)
             return
 
-        lessons = self.lesson_loader.get_lessons(self.current_category)
-        if not lessons:
+        count = self.lesson_loader.get_lesson_count(self.current_category)
+        if not count:
             self.prev_button.set_sensitive(False)
             self.next_button.set_sensitive(False)
             return
 
-        current_index = next(
-            (i for i, l in enumerate(lessons) if l['slug'] == self.current_lesson_slug),
-            -1
+        current_index = self.lesson_loader.get_lesson_index(
+            self.current_category,
+            self.current_lesson_slug
         )
 
         self.prev_button.set_sensitive(current_index > 0)
 
         # Check if we're on the last lesson of this section
-        is_last = current_index == len(lessons) - 1
+        is_last = current_index == count - 1
         next_section = self.get_next_section()
 
         if is_last and next_section:
@@ -1088,6 +1177,21 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
 
         self.complete_button.set_sensitive(True)
 
+    def update_section_progress(self):
+        """Show how much of the current section is complete."""
+        category = self.current_category
+        total = self.lesson_loader.get_lesson_count(category) if category else 0
+        if not total:
+            self.section_progress.set_visible(False)
+            return
+        completed = min(self.progress_tracker.get_category_completed(category), total)
+        self.section_progress.set_fraction(completed / total)
+        self.section_progress.set_tooltip_text(
+            f"{self.lesson_loader.get_category_display_name(category)}: "
+            f"{completed} of {total} lessons complete"
+        )
+        self.section_progress.set_visible(True)
+
     def on_complete_clicked(self, button):
         """Toggle lesson completion status."""
         if not self.current_category or not self.current_lesson_slug:
@@ -1129,6 +1233,7 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
         self.toast_overlay.add_toast(toast)
 
         self.update_complete_button()
+        self.update_section_progress()
 
     def _on_toast_continue_clicked(self, toast):
         """Handle clicking Continue on the section complete toast."""
@@ -1159,29 +1264,29 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
         if not self.current_category or not self.current_lesson_slug:
             return
 
-        lessons = self.lesson_loader.get_lessons(self.current_category)
-        current_index = next(
-            (i for i, l in enumerate(lessons) if l['slug'] == self.current_lesson_slug),
+        prev_slug = self.lesson_loader.get_adjacent_lesson(
+            self.current_category,
+            self.current_lesson_slug,
             -1
         )
 
-        if current_index > 0:
-            self.load_lesson(self.current_category, lessons[current_index - 1]['slug'])
+        if prev_slug:
+            self.load_lesson(self.current_category, prev_slug)
 
     def on_next_clicked(self, button):
         """Load next lesson or next section."""
         if not self.current_category or not self.current_lesson_slug:
             return
 
-        lessons = self.lesson_loader.get_lessons(self.current_category)
-        current_index = next(
-            (i for i, l in enumerate(lessons) if l['slug'] == self.current_lesson_slug),
-            -1
+        next_slug = self.lesson_loader.get_adjacent_lesson(
+            self.current_category,
+            self.current_lesson_slug,
+            1
         )
 
-        if current_index < len(lessons) - 1:
+        if next_slug:
             # Next lesson in same section
-            self.load_lesson(self.current_category, lessons[current_index + 1]['slug'])
+            self.load_lesson(self.current_category, next_slug)
         else:
             # Last lesson - try to go to next section
             next_section = self.get_next_section()
@@ -1190,13 +1295,16 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
 
     def on_index_clicked(self, button):
         """Show lesson index dialog."""
-        dialog = LessonIndexDialog(self, self.lesson_loader, self.progress_tracker)
-        dialog.connect("lesson-selected", self.on_lesson_selected_from_index)
-        dialog.present()
+        # Built once and reused; only the completion marks need refreshing
+        if self.index_dialog is None:
+            self.index_dialog = LessonIndexDialog(self, self.lesson_loader, self.progress_tracker)
+            self.index_dialog.connect("lesson-selected", self.on_lesson_selected_from_index)
+        else:
+            self.index_dialog.refresh_status()
+        self.index_dialog.present()
 
     def on_lesson_selected_from_index(self, dialog, category, lesson_slug):
         """Handle lesson selection from index."""
-        print(f"DEBUG: Signal received - loading {category}/{lesson_slug}")
         dialog.close()
         self.load_lesson(category, lesson_slug)
 
@@ -1212,6 +1320,24 @@ set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
         dialog.present()
 
 
+class LessonIndexItem(GObject.Object):
+    """A row in the lesson index: a category header, a lesson, or the
+    placeholder shown under a category that has no lessons."""
+
+    category = GObject.Property(type=str, default="")
+    slug = GObject.Property(type=str, default="")
+    title = GObject.Property(type=str, default="")
+    description = GObject.Property(type=str, default="")
+    completed = GObject.Property(type=bool, default=False)
+    # Category headers: fraction of the category's lessons completed
+    progress = GObject.Property(type=float, default=0.0)
+    placeholder = GObject.Property(type=bool, default=False)
+
+    @property
+    def is_header(self) -> bool:
+        return not self.slug and not self.placeholder
+
+
 class LessonIndexDialog(Adw.Window):
     """Lesson index/navigation dialog."""
 
@@ -1222,6 +1348,8 @@ class LessonIndexDialog(Adw.Window):
     def __init__(self, parent, lesson_loader, progress_tracker):
         super().__init__(transient_for=parent, title="Lesson Index", modal=True)
         self.set_default_size(700, 600)
+        # Hidden rather than destroyed so it can be reopened instantly
+        self.set_hide_on_close(True)
         self.lesson_loader = lesson_loader
         self.progress_tracker = progress_tracker
 
@@ -1252,26 +1380,30 @@ class LessonIndexDialog(Adw.Window):
 
         main_box.append(title_box)
 
+        # One flat model of category headers and lessons; the list view
+        # only realizes rows for the items that are visible
+        self.store = Gio.ListStore(item_type=LessonIndexItem)
+        self._populate()
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_factory_setup)
+        factory.connect("bind", self._on_factory_bind)
+        factory.connect("unbind", self._on_factory_unbind)
+
+        list_view = Gtk.ListView(model=Gtk.NoSelection(model=self.store), factory=factory)
+        list_view.set_single_click_activate(True)
+        list_view.add_css_class("rich-list")
+        list_view.set_margin_start(20)
+        list_view.set_margin_end(20)
+        list_view.set_margin_bottom(20)
+        list_view.connect("activate", self._on_item_activated)
+
         # Scrolled window for lessons
         scrolled = Gtk.ScrolledWindow()
         scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         scrolled.set_vexpand(True)
         scrolled.set_hexpand(True)
-
-        # Content box for all categories
-        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=24)
-        content_box.set_margin_start(20)
-        content_box.set_margin_end(20)
-        content_box.set_margin_top(12)
-        content_box.set_margin_bottom(20)
-
-        # Add each category
-        categories = self.lesson_loader.get_categories()
-        for category in categories:
-            category_widget = self._create_category_widget(category)
-            content_box.append(category_widget)
-
-        scrolled.set_child(content_box)
+        scrolled.set_child(list_view)
         main_box.append(scrolled)
 
         # Wrap everything
@@ -1281,104 +1413,160 @@ class LessonIndexDialog(Adw.Window):
 
         self.set_content(outer_box)
 
-    def _create_category_widget(self, category: str):
-        """Create a widget for a category with its lessons."""
-        category_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
-
-        # Category header
-        category_label = Gtk.Label(label=self.lesson_loader.get_category_display_name(category))
-        category_label.add_css_class("title-3")
-        category_label.set_halign(Gtk.Align.START)
-        category_box.append(category_label)
-
-        # Lessons in this category
-        lessons = self.lesson_loader.get_lessons(category)
-
-        if lessons:
-            list_box = Gtk.ListBox()
-            list_box.add_css_class("boxed-list")
-            list_box.set_selection_mode(Gtk.SelectionMode.NONE)
-
-            # Store lesson data on the list_box for the signal handler
-            list_box._lessons_data = []
-
+    def _populate(self):
+        """Fill the model from the lesson catalog."""
+        items = []
+        for category in self.lesson_loader.get_categories():
+            items.append(LessonIndexItem(
+                category=category,
+                title=self.lesson_loader.get_category_display_name(category)
+            ))
+            lessons = self.lesson_loader.get_lessons(category)
+            if not lessons:
+                items.append(LessonIndexItem(category=category, placeholder=True))
             for lesson in lessons:
-                row = self._create_lesson_row(category, lesson)
-                # Store the lesson data on the row itself
-                row._category = category
-                row._lesson_slug = lesson['slug']
-                list_box.append(row)
-                list_box._lessons_data.append((category, lesson['slug']))
-
-            # Connect to row-activated signal on the ListBox
-            list_box.connect("row-activated", self._on_row_activated)
-
-            category_box.append(list_box)
-        else:
-            empty_label = Gtk.Label(label="No lessons in this category")
-            empty_label.add_css_class("dim-label")
-            empty_label.set_halign(Gtk.Align.START)
-            empty_label.set_margin_start(12)
-            category_box.append(empty_label)
-
-        return category_box
-
-    def _on_row_activated(self, list_box, row):
-        """Handle row activation."""
-        category = row._category
-        lesson_slug = row._lesson_slug
-        print(f"DEBUG: Row activated - emitting signal for {category}/{lesson_slug}")
-        self.emit("lesson-selected", category, lesson_slug)
-
-    def _create_lesson_row(self, category: str, lesson: dict):
-        """Create a row for a single lesson."""
-        row = Gtk.ListBoxRow()
-        row.set_activatable(True)
+                items.append(LessonIndexItem(
+                    category=category,
+                    slug=lesson['slug'],
+                    title=lesson['title'],
+                    description=lesson.get('description') or ''
+                ))
+        self.store.splice(0, self.store.get_n_items(), items)
+        self.refresh_status()
+
+    def refresh_status(self):
+        """Update completion checkmarks and section progress from the progress tracker."""
+        # One snapshot for every lesson row rather than a tracker lookup each
+        lessons = self.progress_tracker.get_all_progress().get('lessons', {})
+        completed_keys = {key for key, entry in lessons.items()
+                          if entry.get('status') == 'completed'}
+
+        for i in range(self.store.get_n_items()):
+            item = self.store.get_item(i)
+            if item.placeholder:
+                continue
+            if item.is_header:
+                total = self.lesson_loader.get_lesson_count(item.category)
+                completed = self.progress_tracker.get_category_completed(item.category)
+                progress = min(completed / total, 1.0) if total else 0.0
+                if item.progress != progress:
+                    item.progress = progress
+            else:
+                completed = f"{item.category}/{item.slug}" in completed_keys
+                if item.completed != completed:
+                    item.completed = completed
 
-        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+    def _on_factory_setup(self, factory, list_item):
+        """Build the widgets for one row (reused for many items)."""
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
         box.set_margin_start(12)
         box.set_margin_end(12)
         box.set_margin_top(8)
         box.set_margin_bottom(8)
 
-        # Lesson info
-        lesson_info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
-        lesson_info_box.set_hexpand(True)
+        # Category header with the section's progress on the right
+        header_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        header_row.set_margin_top(12)
+
+        category_label = Gtk.Label()
+        category_label.add_css_class("title-3")
+        category_label.set_halign(Gtk.Align.START)
+        category_label.set_hexpand(True)
+        header_row.append(category_label)
+
+        progress_bar = Gtk.ProgressBar()
+        progress_bar.set_valign(Gtk.Align.CENTER)
+        progress_bar.set_size_request(120, -1)
+        header_row.append(progress_bar)
+
+        box.append(header_row)
 
         # Title row with status indicator on the right
         title_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
 
-        title_label = Gtk.Label(label=lesson['title'])
+        title_label = Gtk.Label()
         title_label.set_halign(Gtk.Align.START)
         title_label.add_css_class("heading")
         title_label.set_hexpand(True)
         title_row.append(title_label)
 
         # Status indicator (check mark on the right)
-        status = self.progress_tracker.get_lesson_status(category, lesson['slug'])
-        if status == 'completed':
-            status_icon = "✓"
-            icon_label = Gtk.Label(label=status_icon)
-            icon_label.add_css_class("success")
-            icon_label.set_halign(Gtk.Align.END)
-            title_row.append(icon_label)
+        icon_label = Gtk.Label(label="✓")
+        icon_label.add_css_class("success")
+        icon_label.set_halign(Gtk.Align.END)
+        title_row.append(icon_label)
 
-        lesson_info_box.append(title_row)
+        box.append(title_row)
 
-        if lesson.get('description'):
-            desc_label = Gtk.Label(label=lesson['description'])
-            desc_label.set_halign(Gtk.Align.START)
-            desc_label.add_css_class("dim-label")
-            desc_label.add_css_class("caption")
-            desc_label.set_wrap(True)
-            desc_label.set_xalign(0)
-            lesson_info_box.append(desc_label)
+        desc_label = Gtk.Label()
+        desc_label.set_halign(Gtk.Align.START)
+        desc_label.add_css_class("dim-label")
+        desc_label.add_css_class("caption")
+        desc_label.set_wrap(True)
+        desc_label.set_xalign(0)
+        box.append(desc_label)
+
+        empty_label = Gtk.Label(label="No lessons in this category")
+        empty_label.add_css_class("dim-label")
+        empty_label.set_halign(Gtk.Align.START)
+        box.append(empty_label)
+
+        box._header_row = header_row
+        box._category_label = category_label
+        box._progress_bar = progress_bar
+        box._title_row = title_row
+        box._title_label = title_label
+        box._icon_label = icon_label
+        box._desc_label = desc_label
+        box._empty_label = empty_label
+        list_item.set_child(box)
+
+    def _on_factory_bind(self, factory, list_item):
+        """Show an item in a realized row."""
+        item = list_item.get_item()
+        box = list_item.get_child()
+
+        is_lesson = not item.is_header and not item.placeholder
+        box._header_row.set_visible(item.is_header)
+        box._title_row.set_visible(is_lesson)
+        box._empty_label.set_visible(item.placeholder)
+        list_item.set_activatable(is_lesson)
+
+        if item.placeholder:
+            box._desc_label.set_visible(False)
+            return
+
+        if item.is_header:
+            box._category_label.set_text(item.title)
+            box._desc_label.set_visible(False)
+            box._status_binding = item.bind_property(
+                "progress", box._progress_bar, "fraction",
+                GObject.BindingFlags.SYNC_CREATE
+            )
+            return
 
-        box.append(lesson_info_box)
+        box._title_label.set_text(item.title)
+        box._desc_label.set_text(item.description)
+        box._desc_label.set_visible(bool(item.description))
+        box._status_binding = item.bind_property(
+            "completed", box._icon_label, "visible",
+            GObject.BindingFlags.SYNC_CREATE
+        )
 
-        row.set_child(box)
+    def _on_factory_unbind(self, factory, list_item):
+        """Release the item bound to a row."""
+        box = list_item.get_child()
+        binding = getattr(box, '_status_binding', None)
+        if binding is not None:
+            binding.unbind()
+            box._status_binding = None
 
-        return row
+    def _on_item_activated(self, list_view, position):
+        """Handle row activation."""
+        item = self.store.get_item(position)
+        if item is None or item.is_header or item.placeholder:
+            return
+        self.emit("lesson-selected", item.category, item.slug)
 
 
 class TerminalFunApp(Adw.Application):
@@ -0,0 +1,112 @@
+"""
+Markdown renderer for Terminal Fun.
+Converts the simple markdown used in lessons to Pango markup.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
+
+
+# One alternation per construct, in priority order. Fenced code blocks and
+# headings must win over inline markup; bold code must win over bold.
+_TOKEN_RE = re.compile(
+    r'(?P<block>```[^`]*?```)'
+    r'|^(?P<level>#{1,6})\s+(?P<heading>.+)$'
+    r'|\*\*`(?P<bold_code>[^`\n]+)`\*\*'
+    r'|`(?P<code>[^`\n]+)`'
+    r'|\*\*(?P<bold>(?:`[^`\n]+`|[^*`\n])+?)\*\*',
+    re.MULTILINE
+)
+
+# Inline code inside bold text
+_CODE_RE = re.compile(r'`([^`\n]+)`')
+
+_HEADING_SIZES = {1: 'x-large', 2: 'large'}
+
+# Same escaping as GLib.markup_escape_text(), without needing GLib
+_ESCAPES: Dict[int, str] = {
+    ord('&'): '&amp;',
+    ord('<'): '&lt;',
+    ord('>'): '&gt;',
+    ord("'"): '&apos;',
+    ord('"'): '&quot;',
+}
+for _c in [*range(0x1, 0x9), 0xb, 0xc, *range(0xe, 0x20), *range(0x7f, 0x85), *range(0x86, 0xa0)]:
+    _ESCAPES[_c] = f'&#x{_c:x};'
+
+
+def escape_markup(text: str) -> str:
+    """Escape text for use in Pango markup."""
+    return text.translate(_ESCAPES)
+
+
+def _render_inline_code(text: str) -> str:
+    """Escape text, rendering `code` spans in monospace."""
+    parts = []
+    pos = 0
+    for match in _CODE_RE.finditer(text):
+        parts.append(escape_markup(text[pos:match.start()]))
+        parts.append(f'<tt>{escape_markup(match.group(1))}</tt>')
+        pos = match.end()
+    parts.append(escape_markup(text[pos:]))
+    return ''.join(parts)
+
+
+def _render_token(match: re.Match) -> str:
+    """Render a single markdown construct."""
+    kind = match.lastgroup
+    if kind == 'block':
+        # Remove the fences and the optional language on the first line
+        content = match.group('block')[3:-3]
+        parts = content.split('\n', 1)
+        code = parts[1] if len(parts) > 1 else parts[0]
+        return f'<tt>{escape_markup(code.strip())}</tt>'
+    if kind == 'heading':
+        size = _HEADING_SIZES.get(len(match.group('level')), 'medium')
+        text = escape_markup(match.group('heading').strip())
+        return f'<span size="{size}" weight="bold">{text}</span>'
+    if kind == 'bold_code':
+        return f'<b><tt>{escape_markup(match.group("bold_code"))}</tt></b>'
+    if kind == 'code':
+        return f'<tt>{escape_markup(match.group("code"))}</tt>'
+    return f'<b>{_render_inline_code(match.group("bold"))}</b>'
+
+
+def markdown_to_pango(text: str) -> str:
+    """Convert simple markdown to pango markup in a single pass."""
+    parts = []
+    pos = 0
+    for match in _TOKEN_RE.finditer(text):
+        parts.append(escape_markup(text[pos:match.start()]))
+        parts.append(_render_token(match))
+        pos = match.end()
+    parts.append(escape_markup(text[pos:]))
+    return ''.join(parts)
+
+
+class RenderCache:
+    """LRU cache of rendered markup keyed by lesson and content."""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Hashable, int], Tuple[str, str]]" = OrderedDict()
+
+    def render(self, key: Hashable, text: str) -> str:
+        """Render text, reusing the previous result for the same key and content."""
+        cache_key = (key, hash(text))
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry[0] == text:
+            self._entries.move_to_end(cache_key)
+            return entry[1]
+
+        markup = markdown_to_pango(text)
+        self._entries[cache_key] = (text, markup)
+        self._entries.move_to_end(cache_key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return markup
+
+    def clear(self):
+        """Drop all cached markup."""
+        self._entries.clear()
@@ -0,0 +1,181 @@
+"""
+Package catalog for Terminal Fun's sandbox.
+Compiles the package lists behind the mock apt and snap commands into one
+sorted file that the shell scripts load with mapfile and binary-search, so
+lookups and searches need no subprocesses however large the catalog is.
+
+Usage: python3 package_catalog.py [-o OUTPUT] [--apt FILE]... [--snap FILE]...
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+
+CATALOG_VERSION = 1
+
+# Name of the compiled catalog in the sandbox's lib directory
+CATALOG_FILE = "packages.catalog"
+
+# Package lists shipped with the app
+SOURCE_DIR = Path(__file__).parent / "sandbox" / "catalog"
+
+KINDS = ('apt', 'snap')
+
+# Words too common to be worth searching for
+STOPWORDS = {'a', 'an', 'and', 'for', 'in', 'is', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+_WORD = re.compile(r'[a-z0-9][a-z0-9.+-]*')
+
+
+class CatalogEntry(NamedTuple):
+    """One package (or snap) in the catalog."""
+    kind: str          # 'apt' or 'snap'
+    name: str
+    version: str
+    size: str          # download size in kB for apt, revision for snaps
+    description: str
+
+
+def read_source(path: Path, kind: str) -> List[CatalogEntry]:
+    """Read a tab-separated package list: name, version, size/revision, description."""
+    entries = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            fields = line.split('\t')
+            if len(fields) != 4:
+                print(f"Warning: Skipping malformed catalog line in {path}: {line!r}")
+                continue
+            entries.append(CatalogEntry(kind, *(field.strip() for field in fields)))
+    return entries
+
+
+def read_debian_packages(path: Path) -> List[CatalogEntry]:
+    """Read apt entries from a Debian archive Packages index (as in /var/lib/apt/lists)."""
+    entries = []
+    stanza: Dict[str, str] = {}
+
+    def finish():
+        if 'Package' in stanza:
+            size_kb = -(-int(stanza.get('Size', '0') or 0) // 1024)
+            entries.append(CatalogEntry(
+                'apt', stanza['Package'], stanza.get('Version', '1.0.0-1'),
+                str(max(size_kb, 1)), stanza.get('Description', stanza['Package'])
+            ))
+        stanza.clear()
+
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            if not line.strip():
+                finish()
+            elif not line[0].isspace() and ':' in line:
+                key, _, value = line.partition(':')
+                stanza[key] = value.strip()
+    finish()
+    return entries
+
+
+def tokenize(entry: CatalogEntry) -> Set[str]:
+    """Search words for an entry: its name, the parts of its name and its description's words."""
+    name = entry.name.lower()
+    tokens = {name}
+    for part in re.split(r'[^a-z0-9]+', name):
+        tokens.add(part)
+        if part.startswith('lib') and len(part) > 3:
+            # So that searching for "curl" finds libcurl4
+            tokens.add(part[3:])
+    tokens.update(word.strip('.+-') for word in _WORD.findall(entry.description.lower()))
+    return tokens - STOPWORDS - {''}
+
+
+def build_catalog(entries: Iterable[CatalogEntry]) -> List[str]:
+    """Lines of the compiled catalog.
+
+    Line 0 is a header with the format version and the number of apt and
+    snap records. The records follow, sorted by "kind/name", and then the
+    search index: one "token/<word>" line per word listing the line
+    numbers of the records containing it. The whole file is in byte order
+    so the scripts can binary-search it with LC_ALL=C.
+    """
+    records: Dict[str, CatalogEntry] = {}
+    for entry in entries:
+        # Later sources override earlier ones
+        records[f"{entry.kind}/{entry.name}"] = entry
+
+    keys = sorted(records)
+    counts = {kind: sum(1 for key in keys if key.startswith(kind + '/')) for kind in KINDS}
+    lines = [f"#catalog\t{CATALOG_VERSION}\t{counts['apt']}\t{counts['snap']}"]
+
+    postings: Dict[str, List[int]] = {}
+    for key in keys:
+        entry = records[key]
+        line_number = len(lines)
+        fields = (entry.version, entry.size, entry.description)
+        lines.append('\t'.join([key] + [' '.join(f.split()) or '-' for f in fields]))
+        for token in tokenize(entry):
+            postings.setdefault(token, []).append(line_number)
+
+    for token in sorted(postings):
+        lines.append(f"token/{token}\t{' '.join(map(str, postings[token]))}")
+    return lines
+
+
+def default_entries(source_dir: Path = SOURCE_DIR) -> List[CatalogEntry]:
+    """Entries from the package lists shipped in source_dir."""
+    entries = []
+    for kind in KINDS:
+        path = source_dir / f"{kind}.tsv"
+        if path.exists():
+            entries.extend(read_source(path, kind))
+    return entries
+
+
+def write_catalog(dest: Path, entries: Iterable[CatalogEntry]):
+    """Compile entries into dest, replacing it atomically."""
+    content = '\n'.join(build_catalog(entries)) + '\n'
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dest.parent, prefix=dest.name + '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Compile the sandbox package catalog.")
+    parser.add_argument('-o', '--output', default=CATALOG_FILE,
+                        help=f"catalog to write (default: ./{CATALOG_FILE})")
+    parser.add_argument('--apt', action='append', default=[], metavar='FILE',
+                        help="extra apt list: a .tsv like sandbox/catalog/apt.tsv "
+                             "or a Debian Packages index (repeatable)")
+    parser.add_argument('--snap', action='append', default=[], metavar='FILE',
+                        help="extra snap list in the sandbox/catalog/snap.tsv format (repeatable)")
+    parser.add_argument('--no-defaults', action='store_true',
+                        help="leave out the package lists shipped with Terminal Fun")
+    args = parser.parse_args(argv)
+
+    entries = [] if args.no_defaults else default_entries()
+    for path in map(Path, args.apt):
+        entries.extend(read_source(path, 'apt') if path.suffix == '.tsv' else read_debian_packages(path))
+    for path in map(Path, args.snap):
+        entries.extend(read_source(path, 'snap'))
+
+    write_catalog(Path(args.output), entries)
+    print(f"Wrote {len({(e.kind, e.name) for e in entries})} packages to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,28 +4,195 @@ Tracks user progress through lessons and exercises.
 """
 
 import json
+import os
+import sqlite3
+import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 
+# Journal records written before the journal is folded into the snapshot
+JOURNAL_COMPACT_RECORDS = 500
+
+# Relative file name older versions kept progress in (wherever the app ran)
+LEGACY_PROGRESS_FILE = ".terminal_fun_progress.json"
+
+# Stray files that were merged but could not be renamed, next to the
+# progress file: {path: [mtime_ns, size]}
+MIGRATED_RECORD_FILE = "migrated-progress.json"
+
+
+def default_progress_file() -> Path:
+    """Location of the learner's progress file, next to the virtual home."""
+    return Path.home() / ".local" / "share" / "terminal-fun" / "progress.json"
+
+
+def find_stray_progress_files(exclude: Optional[Path] = None) -> List[Path]:
+    """Progress files older versions may have left behind.
+
+    They were written relative to the working directory, so look in the
+    places the app was usually started from.
+    """
+    search_dirs = [Path.cwd(), Path.home(), Path(__file__).resolve().parent]
+    real_home = os.environ.get("SNAP_REAL_HOME")
+    if real_home:
+        search_dirs.append(Path(real_home))
+
+    excluded = exclude.resolve() if exclude is not None else None
+    found: List[Path] = []
+    seen: Set[Path] = set()
+    for directory in search_dirs:
+        candidate = directory / LEGACY_PROGRESS_FILE
+        try:
+            resolved = candidate.resolve()
+            if resolved in seen or resolved == excluded or not candidate.is_file():
+                continue
+        except OSError:
+            continue
+        seen.add(resolved)
+        found.append(candidate)
+    return found
+
+
+def migrate_stray_progress(tracker, stray_files: Optional[List[Path]] = None,
+                           record_file: Optional[Path] = None) -> int:
+    """Merge stray progress files into tracker and retire them.
+
+    Each merged file (and its journal) is renamed with a ".migrated"
+    suffix so it is only read once. Files that cannot be renamed (say, in
+    a read-only directory) are listed in record_file (default:
+    MIGRATED_RECORD_FILE next to the progress file) by modification time
+    and size instead, and skipped while they stay unchanged. Returns the
+    number of files merged and retired.
+    """
+    if stray_files is None:
+        stray_files = find_stray_progress_files(getattr(tracker, 'progress_file', None))
+    if record_file is None:
+        record_file = default_progress_file().with_name(MIGRATED_RECORD_FILE)
+
+    try:
+        record = json.loads(Path(record_file).read_text())
+    except (OSError, ValueError):
+        record = {}
+    if not isinstance(record, dict):
+        record = {}
+
+    renamed = 0
+    recorded = 0
+    for path in stray_files:
+        try:
+            stat = path.stat()
+            key = str(path.resolve())
+        except OSError:
+            continue
+        signature = [stat.st_mtime_ns, stat.st_size]
+        if record.get(key) == signature:
+            continue
+
+        stray = ProgressTracker(path)
+        tracker.merge_progress(stray.progress)
+        tracker.flush()
+        try:
+            for old in (path, stray.journal_file):
+                if old.exists():
+                    old.rename(old.with_name(old.name + '.migrated'))
+            renamed += 1
+        except OSError as e:
+            print(f"Warning: Could not retire old progress file {path}: {e}")
+            record[key] = signature
+            recorded += 1
+
+    if recorded:
+        try:
+            Path(record_file).parent.mkdir(parents=True, exist_ok=True)
+            Path(record_file).write_text(json.dumps(record, indent=2))
+        except OSError as e:
+            print(f"Warning: Could not record migrated progress files: {e}")
+            recorded = 0
+    return renamed + recorded
+
+
 class ProgressTracker:
     """Manages user progress through lessons."""
-    
-    def __init__(self, progress_file: str = ".terminal_fun_progress.json"):
-        self.progress_file = Path(progress_file)
+
+    def __init__(self, progress_file: Optional[str] = None,
+                 write_delay: Optional[float] = None, use_journal: bool = False,
+                 compact_after: int = JOURNAL_COMPACT_RECORDS):
+        """
+        progress_file: JSON file progress is kept in (default:
+            default_progress_file()).
+        write_delay: seconds to collect changes before writing them from a
+            background thread, or None to write on every change.
+        use_journal: append each change to a journal next to progress_file
+            instead of rewriting the whole file.
+        compact_after: journal records after which the journal is folded
+            into progress_file.
+        """
+        self.progress_file = Path(progress_file) if progress_file else default_progress_file()
+        self.journal_file = self.progress_file.with_name(self.progress_file.name + '.journal')
+        self.write_delay = write_delay
+        self.use_journal = use_journal
+        self.compact_after = compact_after
+        # _lock guards self.progress; _write_lock keeps writes in order
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._pending: List[Dict] = []
+        self._journal_records = 0
+        self._timer: Optional[threading.Timer] = None
         self.progress = self._load_progress()
-    
+        # Counters behind get_stats(), kept up to date by _record()
+        self._stats = {'total': 0, 'completed': 0, 'exercises_completed': 0}
+        self._category_completed: Dict[str, int] = {}
+        for key in self.progress['lessons']:
+            self._count_entry(key, 1)
+
     def _load_progress(self) -> Dict:
         """Load progress from file or create new progress dict."""
+        progress = None
         if self.progress_file.exists():
             try:
                 with open(self.progress_file, 'r') as f:
-                    return json.load(f)
+                    progress = json.load(f)
             except (json.JSONDecodeError, IOError):
-                return self._create_empty_progress()
-        return self._create_empty_progress()
-    
+                progress = None
+        if not isinstance(progress, dict) or not isinstance(progress.get('lessons'), dict):
+            progress = self._create_empty_progress()
+
+        self._replay_journal(progress)
+        return progress
+
+    def _replay_journal(self, progress: Dict):
+        """Apply the changes recorded in the journal since the last snapshot."""
+        try:
+            with open(self.journal_file, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return
+        except IOError as e:
+            print(f"Warning: Could not read progress journal: {e}")
+            return
+
+        complete = content.rfind(b'\n') + 1
+        if complete < len(content):
+            # Drop a record cut short by a crash so new records start on
+            # a fresh line
+            try:
+                os.truncate(self.journal_file, complete)
+            except OSError as e:
+                print(f"Warning: Could not repair progress journal: {e}")
+
+        for line in content[:complete].splitlines():
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(record, dict):
+                self._apply_record(progress, record)
+                self._journal_records += 1
+
     def _create_empty_progress(self) -> Dict:
         """Create an empty progress structure."""
         return {
@@ -33,56 +200,212 @@ class ProgressTracker:
             'last_updated': datetime.now().isoformat(),
             'started_at': datetime.now().isoformat()
         }
-    
+
+    @staticmethod
+    def _apply_record(progress: Dict, record: Dict):
+        """Apply one change record to a progress dict.
+
+        Records set state rather than toggle it, so replaying a record
+        that is already part of the snapshot is harmless.
+        """
+        key = record.get('key')
+        at = record.get('at')
+        op = record.get('op')
+        if not isinstance(key, str):
+            return
+        lessons = progress['lessons']
+
+        if op == 'complete':
+            lesson = lessons.setdefault(key, {})
+            lesson['status'] = 'completed'
+            lesson['completed_at'] = at
+        elif op == 'reset':
+            if key not in lessons:
+                return
+            lessons[key]['status'] = 'not_started'
+            lessons[key].pop('completed_at', None)
+        elif op == 'exercise':
+            lesson = lessons.setdefault(key, {'exercises': {}})
+            lesson.setdefault('exercises', {})[str(record.get('index'))] = {
+                'status': 'completed',
+                'completed_at': at
+            }
+        else:
+            return
+        if at:
+            progress['last_updated'] = at
+
+    def _entry_stats(self, key: str) -> Tuple[int, int, int]:
+        """What one lesson entry adds to the counters: (lessons, completed, exercises)."""
+        entry = self.progress['lessons'].get(key)
+        if not isinstance(entry, dict):
+            return 0, 0, 0
+        exercises = entry.get('exercises')
+        done = sum(
+            1 for e in exercises.values()
+            if isinstance(e, dict) and e.get('status') == 'completed'
+        ) if isinstance(exercises, dict) else 0
+        return 1, int(entry.get('status') == 'completed'), done
+
+    def _count_entry(self, key: str, sign: int):
+        """Add (sign=1) or remove (sign=-1) a lesson entry from the counters."""
+        lessons, completed, exercises = self._entry_stats(key)
+        self._stats['total'] += sign * lessons
+        self._stats['completed'] += sign * completed
+        self._stats['exercises_completed'] += sign * exercises
+        if completed:
+            category = key.split('/', 1)[0]
+            self._category_completed[category] = self._category_completed.get(category, 0) + sign
+
+    def _record(self, op: str, category: str, lesson_slug: str,
+                at: Optional[str] = None, save: bool = True, **fields):
+        """Apply a change to the in-memory progress and (by default) save it."""
+        key = f"{category}/{lesson_slug}"
+        record = {'op': op, 'key': key, 'at': at or datetime.now().isoformat(), **fields}
+        with self._lock:
+            self._count_entry(key, -1)
+            self._apply_record(self.progress, record)
+            self._count_entry(key, 1)
+            self._pending.append(record)
+        if save:
+            self._save_progress()
+
+    def merge_progress(self, other: Dict) -> int:
+        """Merge completions from another progress dict into this one.
+
+        Completions from either side are kept and nothing is reset.
+        Returns the number of lessons and exercises that changed.
+        """
+        lessons = other.get('lessons') if isinstance(other, dict) else None
+        if not isinstance(lessons, dict):
+            return 0
+
+        changes = 0
+        for key, entry in lessons.items():
+            if not isinstance(entry, dict) or '/' not in key:
+                continue
+            category, lesson_slug = key.split('/', 1)
+            if (entry.get('status') == 'completed' and
+                    self.get_lesson_status(category, lesson_slug) != 'completed'):
+                self._record('complete', category, lesson_slug,
+                             at=entry.get('completed_at'), save=False)
+                changes += 1
+
+            exercises = entry.get('exercises')
+            if not isinstance(exercises, dict):
+                continue
+            for index, exercise in exercises.items():
+                if (isinstance(exercise, dict) and exercise.get('status') == 'completed' and
+                        self.get_exercise_status(category, lesson_slug, index) != 'completed'):
+                    self._record('exercise', category, lesson_slug,
+                                 at=exercise.get('completed_at'), save=False,
+                                 index=int(index) if str(index).isdigit() else index)
+                    changes += 1
+
+        if changes:
+            self._save_progress()
+        return changes
+
     def _save_progress(self):
-        """Save progress to file."""
-        self.progress['last_updated'] = datetime.now().isoformat()
+        """Save progress now, or schedule a write-behind save."""
+        with self._lock:
+            self._dirty = True
+            if self.write_delay is None:
+                pending = False
+            else:
+                # Changes made before the timer fires share its write
+                pending = self._timer is not None
+                if not pending:
+                    self._timer = threading.Timer(self.write_delay, self.flush)
+                    self._timer.start()
+        if self.write_delay is None:
+            self.flush()
+
+    def flush(self):
+        """Write unsaved changes to disk."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                records = self._pending
+                # Start with a snapshot so started_at survives restarts
+                compact = (not self.use_journal or
+                           self._journal_records + len(records) > self.compact_after or
+                           not self.progress_file.exists())
+                if compact:
+                    data = json.dumps(self.progress, indent=2)
+                else:
+                    data = ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records)
+                self._pending = []
+                self._dirty = False
+            try:
+                if compact:
+                    self._write_file(data)
+                    if self._journal_records:
+                        # The snapshot now holds everything the journal did
+                        self.journal_file.unlink(missing_ok=True)
+                        self._journal_records = 0
+                else:
+                    self._append_journal(data)
+                    self._journal_records += len(records)
+            except OSError as e:
+                print(f"Warning: Could not save progress: {e}")
+                with self._lock:
+                    self._pending[:0] = records
+                    self._dirty = True
+
+    def close(self):
+        """Flush pending changes; call before the application exits."""
+        self.flush()
+
+    def _write_file(self, data: str):
+        """Replace the progress file atomically (temp file, fsync, rename)."""
+        directory = self.progress_file.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{self.progress_file.name}.", dir=directory)
         try:
-            with open(self.progress_file, 'w') as f:
-                json.dump(self.progress, f, indent=2)
-        except IOError as e:
-            print(f"Warning: Could not save progress: {e}")
-    
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.progress_file)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _append_journal(self, data: str):
+        """Append records to the journal and fsync them."""
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_file, 'a') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
     def get_lesson_status(self, category: str, lesson_slug: str) -> str:
         """Get the status of a lesson: 'completed' or 'not_started'."""
         key = f"{category}/{lesson_slug}"
         lesson_data = self.progress['lessons'].get(key, {})
         return lesson_data.get('status', 'not_started')
-    
+
     def complete_lesson(self, category: str, lesson_slug: str):
         """Mark a lesson as completed."""
-        key = f"{category}/{lesson_slug}"
-        if key not in self.progress['lessons']:
-            self.progress['lessons'][key] = {}
-        
-        self.progress['lessons'][key]['status'] = 'completed'
-        self.progress['lessons'][key]['completed_at'] = datetime.now().isoformat()
-        self._save_progress()
-    
+        self._record('complete', category, lesson_slug)
+
     def uncomplete_lesson(self, category: str, lesson_slug: str):
         """Mark a lesson as not completed (reset)."""
-        key = f"{category}/{lesson_slug}"
-        if key in self.progress['lessons']:
-            self.progress['lessons'][key]['status'] = 'not_started'
-            if 'completed_at' in self.progress['lessons'][key]:
-                del self.progress['lessons'][key]['completed_at']
-            self._save_progress()
-    
+        if f"{category}/{lesson_slug}" in self.progress['lessons']:
+            self._record('reset', category, lesson_slug)
+
     def complete_exercise(self, category: str, lesson_slug: str, exercise_index: int):
         """Mark an exercise as completed."""
-        key = f"{category}/{lesson_slug}"
-        if key not in self.progress['lessons']:
-            self.progress['lessons'][key] = {'exercises': {}}
-        
-        if 'exercises' not in self.progress['lessons'][key]:
-            self.progress['lessons'][key]['exercises'] = {}
-        
-        self.progress['lessons'][key]['exercises'][str(exercise_index)] = {
-            'status': 'completed',
-            'completed_at': datetime.now().isoformat()
-        }
-        self._save_progress()
-    
+        self._record('exercise', category, lesson_slug, index=exercise_index)
+
     def get_exercise_status(self, category: str, lesson_slug: str, exercise_index: int) -> str:
         """Get the status of an exercise: 'completed' or 'not_started'."""
         key = f"{category}/{lesson_slug}"
@@ -90,19 +413,267 @@ class ProgressTracker:
         exercises = lesson_data.get('exercises', {})
         exercise_data = exercises.get(str(exercise_index), {})
         return exercise_data.get('status', 'not_started')
-    
+
     def get_all_progress(self) -> Dict:
         """Get all progress data."""
-        return self.progress.copy()
-    
+        with self._lock:
+            return self.progress.copy()
+
     def get_stats(self) -> Dict:
         """Get overall progress statistics."""
-        lessons = self.progress.get('lessons', {})
-        total = len(lessons)
-        completed = sum(1 for l in lessons.values() if l.get('status') == 'completed')
-        
+        with self._lock:
+            total = self._stats['total']
+            completed = self._stats['completed']
+            exercises_completed = self._stats['exercises_completed']
+
         return {
             'total': total,
             'completed': completed,
-            'not_started': total - completed
+            'not_started': total - completed,
+            'exercises_completed': exercises_completed
         }
+
+    def get_category_completed(self, category: str) -> int:
+        """Number of completed lessons in a category."""
+        return self._category_completed.get(category, 0)
+
+
+class SQLiteProgressTracker:
+    """ProgressTracker API backed by a shared SQLite database.
+
+    Meant for machines where many learners (or several app instances)
+    share one progress store: rows are keyed by learner, category and
+    lesson, every change is its own transaction and reads always see
+    what other instances committed.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS learners (
+            learner TEXT PRIMARY KEY,
+            started_at TEXT NOT NULL,
+            last_updated TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS lessons (
+            learner TEXT NOT NULL,
+            category TEXT NOT NULL,
+            lesson TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'not_started',
+            completed_at TEXT,
+            PRIMARY KEY (learner, category, lesson)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS exercises (
+            learner TEXT NOT NULL,
+            category TEXT NOT NULL,
+            lesson TEXT NOT NULL,
+            exercise INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            completed_at TEXT,
+            PRIMARY KEY (learner, category, lesson, exercise)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS lessons_by_status ON lessons (learner, status, category);
+    """
+
+    def __init__(self, database: str, learner: Optional[str] = None):
+        """
+        database: path of the SQLite database (created if missing).
+        learner: whose progress to track; defaults to the current user.
+        """
+        self.database = Path(database)
+        self.learner = learner or os.environ.get("USER", "learner")
+        self._lock = threading.Lock()
+
+        self.database.parent.mkdir(parents=True, exist_ok=True)
+        # Callers may use the tracker from worker threads; _lock serializes
+        # access to the single connection
+        self._conn = sqlite3.connect(str(self.database), timeout=5.0,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        now = datetime.now().isoformat()
+        self._conn.execute(
+            "INSERT OR IGNORE INTO learners (learner, started_at, last_updated) VALUES (?, ?, ?)",
+            (self.learner, now, now)
+        )
+
+    def _write(self, statements):
+        """Run (sql, params) statements in one transaction."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute(
+                    "UPDATE learners SET last_updated = ? WHERE learner = ?",
+                    (now, self.learner)
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                print(f"Warning: Could not save progress: {e}")
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        """Run a read-only query."""
+        with self._lock:
+            try:
+                return self._conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                print(f"Warning: Could not read progress: {e}")
+                return []
+
+    def get_lesson_status(self, category: str, lesson_slug: str) -> str:
+        """Get the status of a lesson: 'completed' or 'not_started'."""
+        rows = self._query(
+            "SELECT status FROM lessons WHERE learner = ? AND category = ? AND lesson = ?",
+            (self.learner, category, lesson_slug)
+        )
+        return rows[0][0] if rows else 'not_started'
+
+    def complete_lesson(self, category: str, lesson_slug: str):
+        """Mark a lesson as completed."""
+        self._write([(
+            "INSERT INTO lessons (learner, category, lesson, status, completed_at) "
+            "VALUES (?, ?, ?, 'completed', ?) "
+            "ON CONFLICT (learner, category, lesson) DO UPDATE SET "
+            "status = 'completed', completed_at = excluded.completed_at",
+            (self.learner, category, lesson_slug, datetime.now().isoformat())
+        )])
+
+    def uncomplete_lesson(self, category: str, lesson_slug: str):
+        """Mark a lesson as not completed (reset)."""
+        self._write([(
+            "UPDATE lessons SET status = 'not_started', completed_at = NULL "
+            "WHERE learner = ? AND category = ? AND lesson = ?",
+            (self.learner, category, lesson_slug)
+        )])
+
+    def complete_exercise(self, category: str, lesson_slug: str, exercise_index: int):
+        """Mark an exercise as completed."""
+        self._write([
+            ("INSERT OR IGNORE INTO lessons (learner, category, lesson) VALUES (?, ?, ?)",
+             (self.learner, category, lesson_slug)),
+            ("INSERT INTO exercises (learner, category, lesson, exercise, status, completed_at) "
+             "VALUES (?, ?, ?, ?, 'completed', ?) "
+             "ON CONFLICT (learner, category, lesson, exercise) DO UPDATE SET "
+             "status = 'completed', completed_at = excluded.completed_at",
+             (self.learner, category, lesson_slug, exercise_index, datetime.now().isoformat())),
+        ])
+
+    def get_exercise_status(self, category: str, lesson_slug: str, exercise_index: int) -> str:
+        """Get the status of an exercise: 'completed' or 'not_started'."""
+        rows = self._query(
+            "SELECT status FROM exercises "
+            "WHERE learner = ? AND category = ? AND lesson = ? AND exercise = ?",
+            (self.learner, category, lesson_slug, exercise_index)
+        )
+        return rows[0][0] if rows else 'not_started'
+
+    def get_all_progress(self) -> Dict:
+        """Get all progress data, in the same shape as ProgressTracker."""
+        progress = {'lessons': {}}
+        for started_at, last_updated in self._query(
+                "SELECT started_at, last_updated FROM learners WHERE learner = ?", (self.learner,)):
+            progress['started_at'] = started_at
+            progress['last_updated'] = last_updated
+
+        lessons = progress['lessons']
+        for category, lesson, status, completed_at in self._query(
+                "SELECT category, lesson, status, completed_at FROM lessons WHERE learner = ?",
+                (self.learner,)):
+            entry = lessons.setdefault(f"{category}/{lesson}", {})
+            entry['status'] = status
+            if completed_at:
+                entry['completed_at'] = completed_at
+        for category, lesson, exercise, status, completed_at in self._query(
+                "SELECT category, lesson, exercise, status, completed_at FROM exercises "
+                "WHERE learner = ?", (self.learner,)):
+            entry = lessons.setdefault(f"{category}/{lesson}", {})
+            entry.setdefault('exercises', {})[str(exercise)] = {
+                'status': status,
+                'completed_at': completed_at
+            }
+        return progress
+
+    def get_stats(self) -> Dict:
+        """Get overall progress statistics."""
+        rows = self._query(
+            "SELECT COUNT(*), COALESCE(SUM(status = 'completed'), 0) FROM lessons WHERE learner = ?",
+            (self.learner,)
+        )
+        total, completed = rows[0] if rows else (0, 0)
+        rows = self._query(
+            "SELECT COUNT(*) FROM exercises WHERE learner = ? AND status = 'completed'",
+            (self.learner,)
+        )
+        exercises_completed = rows[0][0] if rows else 0
+        return {
+            'total': total,
+            'completed': completed,
+            'not_started': total - completed,
+            'exercises_completed': exercises_completed
+        }
+
+    def get_category_completed(self, category: str) -> int:
+        """Number of completed lessons in a category."""
+        rows = self._query(
+            "SELECT COUNT(*) FROM lessons WHERE learner = ? AND status = 'completed' AND category = ?",
+            (self.learner, category)
+        )
+        return rows[0][0] if rows else 0
+
+    def merge_progress(self, other: Dict) -> int:
+        """Merge completions from a ProgressTracker-style progress dict.
+
+        Completions from either side are kept and nothing is reset.
+        Returns the number of completed lessons and exercises offered.
+        """
+        lessons = other.get('lessons') if isinstance(other, dict) else None
+        if not isinstance(lessons, dict):
+            return 0
+
+        now = datetime.now().isoformat()
+        statements = []
+        for key, entry in lessons.items():
+            if not isinstance(entry, dict) or '/' not in key:
+                continue
+            category, lesson_slug = key.split('/', 1)
+            statements.append((
+                "INSERT OR IGNORE INTO lessons (learner, category, lesson) VALUES (?, ?, ?)",
+                (self.learner, category, lesson_slug)
+            ))
+            if entry.get('status') == 'completed':
+                statements.append((
+                    "UPDATE lessons SET status = 'completed', completed_at = ? "
+                    "WHERE learner = ? AND category = ? AND lesson = ? AND status != 'completed'",
+                    (entry.get('completed_at') or now, self.learner, category, lesson_slug)
+                ))
+            exercises = entry.get('exercises')
+            if not isinstance(exercises, dict):
+                continue
+            for index, exercise in exercises.items():
+                if (isinstance(exercise, dict) and exercise.get('status') == 'completed' and
+                        str(index).isdigit()):
+                    statements.append((
+                        "INSERT INTO exercises (learner, category, lesson, exercise, status, completed_at) "
+                        "VALUES (?, ?, ?, ?, 'completed', ?) "
+                        "ON CONFLICT (learner, category, lesson, exercise) DO UPDATE SET "
+                        "status = 'completed', completed_at = excluded.completed_at "
+                        "WHERE exercises.status != 'completed'",
+                        (self.learner, category, lesson_slug, int(index),
+                         exercise.get('completed_at') or now)
+                    ))
+
+        changes = sum(1 for sql, _ in statements if not sql.startswith("INSERT OR IGNORE"))
+        if changes:
+            self._write(statements)
+        return changes
+
+    def flush(self):
+        """Changes are committed as they are made; nothing to do."""
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
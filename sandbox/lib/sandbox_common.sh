@@ -2,12 +2,23 @@
 # Terminal Fun - Sandbox Common Library
 # Shared functions for mock commands
 
-# Get the sandbox directory (parent of lib/)
-SANDBOX_DIR="$(dirname "$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")")"
+# Already loaded by the command that sourced this one (sudo runs the
+# mock it delegates to in its own process)
+[ -n "${SANDBOX_COMMON_LOADED:-}" ] && return 0
+SANDBOX_COMMON_LOADED=1
+
+# Get the sandbox directory (parent of lib/). Everything that runs on
+# every command sticks to shell builtins: a mock apt in a loop should not
+# pay for a dozen helper processes before it does any work.
+SANDBOX_DIR="${BASH_SOURCE[0]%/lib/*}"
+[[ "$SANDBOX_DIR" == /* ]] || SANDBOX_DIR="${PWD}/${SANDBOX_DIR}"
 STATE_DIR="${SANDBOX_DIR}/state"
 
 # Ensure state directory exists
-mkdir -p "${STATE_DIR}" 2>/dev/null
+[ -d "${STATE_DIR}" ] || mkdir -p "${STATE_DIR}" 2>/dev/null
+
+# Name of the learner, as whoami would print it
+SANDBOX_USER="${USER:-$(id -un 2>/dev/null || echo learner)}"
 
 # Color codes
 RED='\033[0;31m'
@@ -187,64 +198,492 @@ EOF
     fi
 }
 
+# Installed packages, snaps and services are each kept as a snapshot
+# file plus a journal of the changes made since ("+line" adds or replaces
+# an entry, "-key" removes one). Readers and writers lock the state
+# directory, so commands running at the same time (say, background jobs)
+# never lose each other's updates. A command stages its changes in memory
+# and appends them in one write; the journal is folded into the snapshot
+# once it grows long.
+STATE_LOCK_FILE="${STATE_DIR}/.lock"
+STATE_COMPACT_RECORDS=200
+STATE_LOCK_FD=""
+declare -A STATE_JOURNAL_RECORDS
+
+declare -A APT_INSTALLED
+declare -A SNAP_INSTALLED
+APT_STATE_LOADED=false
+SNAP_STATE_LOADED=false
+APT_PENDING=()
+SNAP_PENDING=()
+
+# Lock the state directory: state_lock -s to read, state_lock -x to write.
+# Without flock the commands still work, just unlocked.
+state_lock() {
+    state_unlock
+    exec {STATE_LOCK_FD}>>"${STATE_LOCK_FILE}" || { STATE_LOCK_FD=""; return 0; }
+    flock "$1" "$STATE_LOCK_FD" 2>/dev/null
+    return 0
+}
+
+# Release the state lock (closing the descriptor drops it)
+state_unlock() {
+    [ -n "$STATE_LOCK_FD" ] || return 0
+    exec {STATE_LOCK_FD}>&-
+    STATE_LOCK_FD=""
+}
+
+# Read a store's snapshot and journal into an associative array of
+# key -> line. $1: array name, $2: snapshot file, $3: character ending the
+# key in a line (empty when the whole line is the key)
+read_state_store() {
+    local -n store_entries="$1"
+    local file="$2" sep="$3" line key
+    local -a lines journal
+    store_entries=()
+    mapfile -t lines 2>/dev/null < "$file"
+    mapfile -t journal 2>/dev/null < "${file}.journal"
+    for line in "${lines[@]}"; do
+        [[ -z "$line" || "$line" == \#* ]] && continue
+        key="$line"
+        [ -n "$sep" ] && key="${line%%"$sep"*}"
+        store_entries["$key"]="$line"
+    done
+    for line in "${journal[@]}"; do
+        case "$line" in
+            +?*)
+                line="${line:1}"
+                key="$line"
+                [ -n "$sep" ] && key="${line%%"$sep"*}"
+                store_entries["$key"]="$line"
+                ;;
+            -?*)
+                key="${line:1}"
+                unset 'store_entries[$key]'
+                ;;
+        esac
+    done
+    STATE_JOURNAL_RECORDS["$file"]=${#journal[@]}
+}
+
+# Append a store's staged changes to its journal and compact it if needed.
+# Must be called with the exclusive lock held. $1: array name, $2: name of
+# the array of staged records, $3: snapshot file, $4: key separator,
+# $5: header line for a rewritten snapshot
+commit_state_store() {
+    local -n commit_entries="$1" commit_pending="$2"
+    local file="$3" sep="$4" header="$5"
+    [ ${#commit_pending[@]} -gt 0 ] || return 0
+    printf '%s\n' "${commit_pending[@]}" >> "${file}.journal"
+    commit_pending=()
+
+    # Pick up what other commands appended since this one read the store
+    read_state_store "$1" "$file" "$sep"
+    if (( STATE_JOURNAL_RECORDS[$file] > STATE_COMPACT_RECORDS )); then
+        {
+            printf '%s\n' "$header"
+            [ ${#commit_entries[@]} -eq 0 ] || printf '%s\n' "${commit_entries[@]}"
+        } > "${file}.tmp" && mv -f "${file}.tmp" "$file" && : > "${file}.journal"
+    fi
+}
+
+# Write every staged package, snap and service change in one locked transaction
+commit_state() {
+    [ ${#APT_PENDING[@]} -gt 0 ] || [ ${#SNAP_PENDING[@]} -gt 0 ] ||
+        [ ${#SERVICE_PENDING[@]} -gt 0 ] || [ ${#SERVICE_LOG_PENDING[@]} -gt 0 ] || return 0
+    state_lock -x
+    commit_state_store APT_INSTALLED APT_PENDING "${APT_STATE_FILE}" "" \
+        "# Installed packages"
+    commit_state_store SNAP_INSTALLED SNAP_PENDING "${SNAP_STATE_FILE}" "," \
+        "# Format: name,version,rev,tracking,publisher,notes"
+    commit_state_store SERVICE_STATES SERVICE_PENDING "${SERVICE_STATE_FILE}" "|" \
+        "# Format: unit|description|active|enabled|since|pid|port"
+    commit_service_log
+    state_unlock
+}
+
+# Read the installed apt packages into APT_INSTALLED
+load_apt_state() {
+    $APT_STATE_LOADED && return 0
+    state_lock -s
+    init_apt_state
+    read_state_store APT_INSTALLED "${APT_STATE_FILE}" ""
+    state_unlock
+    APT_STATE_LOADED=true
+}
+
+# Read the installed snaps into SNAP_INSTALLED (name -> state line)
+load_snap_state() {
+    $SNAP_STATE_LOADED && return 0
+    state_lock -s
+    init_snap_state
+    read_state_store SNAP_INSTALLED "${SNAP_STATE_FILE}" ","
+    state_unlock
+    SNAP_STATE_LOADED=true
+}
+
 # Check if an apt package is installed (in our mock state)
 is_apt_package_installed() {
     local package="$1"
-    init_apt_state
-    grep -q "^${package}$" "${APT_STATE_FILE}" 2>/dev/null
+    [ -n "$package" ] || return 1
+    load_apt_state
+    [ -n "${APT_INSTALLED[$package]}" ]
 }
 
-# Add an apt package to installed state
+# Stage an apt package as installed (written by commit_state)
 add_apt_package() {
     local package="$1"
-    init_apt_state
-    if ! is_apt_package_installed "$package"; then
-        echo "$package" >> "${APT_STATE_FILE}"
-    fi
+    is_apt_package_installed "$package" && return 0
+    APT_INSTALLED["$package"]="$package"
+    APT_PENDING+=("+${package}")
 }
 
-# Remove an apt package from installed state
+# Stage an apt package as removed (written by commit_state)
 remove_apt_package() {
     local package="$1"
-    init_apt_state
-    if [ -f "${APT_STATE_FILE}" ]; then
-        grep -v "^${package}$" "${APT_STATE_FILE}" > "${APT_STATE_FILE}.tmp" 2>/dev/null
-        mv "${APT_STATE_FILE}.tmp" "${APT_STATE_FILE}"
-    fi
+    is_apt_package_installed "$package" || return 0
+    unset 'APT_INSTALLED[$package]'
+    APT_PENDING+=("-${package}")
 }
 
 # Get list of installed apt packages
 get_installed_apt_packages() {
-    init_apt_state
-    grep -v "^#" "${APT_STATE_FILE}" 2>/dev/null | grep -v "^$" | sort
+    load_apt_state
+    [ ${#APT_INSTALLED[@]} -gt 0 ] || return 0
+    printf '%s\n' "${!APT_INSTALLED[@]}" | LC_ALL=C sort
 }
 
 # Check if a snap is installed
 is_snap_installed() {
     local snap_name="$1"
-    init_snap_state
-    grep -q "^${snap_name}," "${SNAP_STATE_FILE}" 2>/dev/null
+    [ -n "$snap_name" ] || return 1
+    load_snap_state
+    [ -n "${SNAP_INSTALLED[$snap_name]}" ]
 }
 
-# Add a snap to installed state
+# Stage a snap as installed (written by commit_state)
 add_snap() {
     local snap_name="$1"
     local version="${2:-1.0}"
     local rev="${3:-1}"
-    init_snap_state
-    if ! is_snap_installed "$snap_name"; then
-        echo "${snap_name},${version},${rev},latest/stable,publisher,-" >> "${SNAP_STATE_FILE}"
-    fi
+    is_snap_installed "$snap_name" && return 0
+    local line="${snap_name},${version},${rev},latest/stable,publisher,-"
+    SNAP_INSTALLED["$snap_name"]="$line"
+    SNAP_PENDING+=("+${line}")
 }
 
-# Remove a snap from installed state
+# Stage a snap as removed (written by commit_state)
 remove_snap() {
     local snap_name="$1"
-    init_snap_state
-    if [ -f "${SNAP_STATE_FILE}" ]; then
-        grep -v "^${snap_name}," "${SNAP_STATE_FILE}" > "${SNAP_STATE_FILE}.tmp" 2>/dev/null
-        mv "${SNAP_STATE_FILE}.tmp" "${SNAP_STATE_FILE}"
+    is_snap_installed "$snap_name" || return 0
+    unset 'SNAP_INSTALLED[$snap_name]'
+    SNAP_PENDING+=("-${snap_name}")
+}
+
+# systemd units, one "unit|description|active|enabled|since|pid|port" line
+# each: active is active, inactive or failed, since is when the unit
+# entered that state (seconds since the epoch, 0 for never) and port is
+# the TCP port the service listens on (- for none), so that two web
+# servers started together clash like they would on a real system
+SERVICE_STATE_FILE="${STATE_DIR}/services.txt"
+
+# What systemctl status shows from each unit's journal: "time|unit|ident|message"
+SERVICE_LOG_FILE="${STATE_DIR}/services.log"
+SERVICE_LOG_LINES=1000
+
+# Names learners type for units that are called something else
+declare -A SERVICE_ALIASES=(
+    [sshd]="ssh"
+    [networkmanager]="NetworkManager"
+    [docker.io]="docker"
+)
+
+declare -A SERVICE_STATES
+SERVICE_STATE_LOADED=false
+SERVICE_PENDING=()
+SERVICE_LOG_PENDING=()
+
+init_service_state() {
+    if [ ! -f "${SERVICE_STATE_FILE}" ]; then
+        # Started at boot, an hour ago
+        local boot=$((EPOCHSECONDS - 3600))
+        cat > "${SERVICE_STATE_FILE}" << EOF2
+# Format: unit|description|active|enabled|since|pid|port
+bluetooth.service|Bluetooth service|active|enabled|${boot}|734|-
+cron.service|Regular background program processing daemon|active|enabled|${boot}|741|-
+cups.service|CUPS Scheduler|active|enabled|${boot}|1187|631
+gdm.service|GNOME Display Manager|active|enabled|${boot}|1342|-
+NetworkManager.service|Network Manager|active|enabled|${boot}|786|-
+snapd.service|Snap Daemon|active|enabled|${boot}|812|-
+ssh.service|OpenBSD Secure Shell server|active|enabled|${boot}|1203|22
+ufw.service|Uncomplicated firewall|active|enabled|${boot}|512|-
+EOF2
+    fi
+}
+
+# Read the units into SERVICE_STATES (unit -> state line)
+load_service_state() {
+    $SERVICE_STATE_LOADED && return 0
+    state_lock -s
+    init_service_state
+    read_state_store SERVICE_STATES "${SERVICE_STATE_FILE}" "|"
+    state_unlock
+    SERVICE_STATE_LOADED=true
+}
+
+# Resolve a unit as typed (nginx, nginx.service, sshd) into SERVICE_UNIT;
+# fails for units that do not exist, leaving SERVICE_UNIT set to the name
+# an error message should show
+find_service() {
+    local name="${1%.service}"
+    load_service_state
+    SERVICE_UNIT="${name}.service"
+    [ -n "${SERVICE_STATES[$SERVICE_UNIT]}" ] && return 0
+    name="${name,,}"
+    name="${SERVICE_ALIASES[$name]:-$name}.service"
+    [ -n "${SERVICE_STATES[$name]}" ] || return 1
+    SERVICE_UNIT="$name"
+}
+
+# Set SERVICE_DESC, SERVICE_ACTIVE, SERVICE_ENABLED, SERVICE_SINCE,
+# SERVICE_PID and SERVICE_PORT for a unit in SERVICE_STATES
+service_entry() {
+    local unit
+    IFS='|' read -r unit SERVICE_DESC SERVICE_ACTIVE SERVICE_ENABLED \
+        SERVICE_SINCE SERVICE_PID SERVICE_PORT <<< "${SERVICE_STATES[$1]}"
+}
+
+# Stage a unit's state (written by commit_state).
+# $1: unit, $2: description, $3: active, $4: enabled, $5: since, $6: pid, $7: port
+set_service() {
+    local line="${1}|${2}|${3}|${4}|${5}|${6}|${7:--}"
+    load_service_state
+    SERVICE_STATES["$1"]="$line"
+    SERVICE_PENDING+=("+${line}")
+}
+
+# Stage a unit as removed (written by commit_state)
+remove_service() {
+    load_service_state
+    [ -n "${SERVICE_STATES[$1]}" ] || return 0
+    unset 'SERVICE_STATES[$1]'
+    SERVICE_PENDING+=("-${1}")
+}
+
+# Stage a journal line for a unit. $1: unit, $2: process that logged it, $3: message
+service_log() {
+    SERVICE_LOG_PENDING+=("${EPOCHSECONDS}|${1}|${2}|${3}")
+}
+
+# Start a unit that exists. Fails, leaving the unit failed, when another
+# running unit already listens on its port
+start_service() {
+    local unit="$1" other
+    service_entry "$unit"
+    [ "$SERVICE_ACTIVE" == "active" ] && return 0
+    local pid=$((RANDOM % 30000 + 2000))
+    service_log "$unit" "systemd[1]" "Starting ${unit} - ${SERVICE_DESC}..."
+
+    if [ "$SERVICE_PORT" != "-" ]; then
+        for other in "${!SERVICE_STATES[@]}"; do
+            [ "$other" == "$unit" ] && continue
+            [[ "${SERVICE_STATES[$other]}" == *"|active|"*"|${SERVICE_PORT}" ]] || continue
+            service_log "$unit" "${unit%.service}[${pid}]" \
+                "bind() to 0.0.0.0:${SERVICE_PORT} failed (98: Address already in use)"
+            service_log "$unit" "systemd[1]" "${unit}: Control process exited, code=exited, status=1/FAILURE"
+            service_log "$unit" "systemd[1]" "${unit}: Failed with result 'exit-code'."
+            service_log "$unit" "systemd[1]" "Failed to start ${unit} - ${SERVICE_DESC}."
+            set_service "$unit" "$SERVICE_DESC" failed "$SERVICE_ENABLED" "$EPOCHSECONDS" "$pid" "$SERVICE_PORT"
+            return 1
+        done
     fi
+
+    service_log "$unit" "systemd[1]" "Started ${unit} - ${SERVICE_DESC}."
+    set_service "$unit" "$SERVICE_DESC" active "$SERVICE_ENABLED" "$EPOCHSECONDS" "$pid" "$SERVICE_PORT"
+}
+
+# Stop a unit that exists (a failed unit stays failed until reset-failed)
+stop_service() {
+    local unit="$1"
+    service_entry "$unit"
+    [ "$SERVICE_ACTIVE" == "active" ] || return 0
+    service_log "$unit" "systemd[1]" "Stopping ${unit} - ${SERVICE_DESC}..."
+    service_log "$unit" "systemd[1]" "${unit}: Deactivated successfully."
+    service_log "$unit" "systemd[1]" "Stopped ${unit} - ${SERVICE_DESC}."
+    set_service "$unit" "$SERVICE_DESC" inactive "$SERVICE_ENABLED" "$EPOCHSECONDS" 0 "$SERVICE_PORT"
+}
+
+# Print the last $2 journal lines for a unit, oldest first
+print_service_log() {
+    local unit="$1" wanted="$2" i
+    local -a log shown
+    mapfile -t log 2>/dev/null < "${SERVICE_LOG_FILE}"
+    log+=("${SERVICE_LOG_PENDING[@]}")
+    for (( i = ${#log[@]} - 1; i >= 0 && ${#shown[@]} < wanted; i-- )); do
+        [[ "${log[i]}" == *"|${unit}|"* ]] && shown=("${log[i]}" "${shown[@]}")
+    done
+    local time name ident message
+    for i in "${shown[@]}"; do
+        IFS='|' read -r time name ident message <<< "$i"
+        printf '%(%b %d %H:%M:%S)T terminal-fun %s: %s\n' "$time" "$ident" "$message"
+    done
+    [ ${#shown[@]} -gt 0 ]
+}
+
+# Append the staged journal lines, keeping only the newest half of the
+# log once it passes SERVICE_LOG_LINES. Must be called with the exclusive lock held
+commit_service_log() {
+    [ ${#SERVICE_LOG_PENDING[@]} -gt 0 ] || return 0
+    local -a log
+    mapfile -t log 2>/dev/null < "${SERVICE_LOG_FILE}"
+    if (( ${#log[@]} + ${#SERVICE_LOG_PENDING[@]} > SERVICE_LOG_LINES )); then
+        log+=("${SERVICE_LOG_PENDING[@]}")
+        printf '%s\n' "${log[@]: -$((SERVICE_LOG_LINES / 2))}" > "${SERVICE_LOG_FILE}.tmp" &&
+            mv -f "${SERVICE_LOG_FILE}.tmp" "${SERVICE_LOG_FILE}"
+    else
+        printf '%s\n' "${SERVICE_LOG_PENDING[@]}" >> "${SERVICE_LOG_FILE}"
+    fi
+    SERVICE_LOG_PENDING=()
+}
+
+# Package catalog compiled by package_catalog.py: a header line, the apt
+# and snap records sorted by "kind/name", then "token/<word>" lines listing
+# the line numbers of the records whose name or description has that word.
+# It is loaded with mapfile and binary-searched, so nothing here forks.
+# TERMINAL_FUN_PACKAGE_CATALOG points the commands at another catalog.
+CATALOG_FILE="${TERMINAL_FUN_PACKAGE_CATALOG:-${SANDBOX_DIR}/lib/packages.catalog}"
+CATALOG=()
+CATALOG_APT_COUNT=0
+CATALOG_SNAP_COUNT=0
+CATALOG_HAS_INDEX=false
+
+# Load the catalog records (and with "search", the search index as well)
+load_catalog() {
+    local want="$1" header version
+    if [ ${#CATALOG[@]} -gt 0 ] && { [ "$want" != "search" ] || $CATALOG_HAS_INDEX; }; then
+        return 0
+    fi
+    [ -r "${CATALOG_FILE}" ] || return 1
+    IFS=$'\t' read -r header version CATALOG_APT_COUNT CATALOG_SNAP_COUNT < "${CATALOG_FILE}"
+    [ "$header" == "#catalog" ] && [ "$version" == "1" ] || return 1
+    if [ "$want" == "search" ]; then
+        mapfile -t CATALOG < "${CATALOG_FILE}"
+        CATALOG_HAS_INDEX=true
+    else
+        # Records come before the index, so stop reading after them
+        mapfile -t -n $((1 + CATALOG_APT_COUNT + CATALOG_SNAP_COUNT)) CATALOG < "${CATALOG_FILE}"
+    fi
+}
+
+# Set CATALOG_POS to the first catalog line that does not sort before $1
+catalog_lower_bound() {
+    local key="$1" lo=0 hi=${#CATALOG[@]} mid
+    local LC_ALL=C
+    while (( lo < hi )); do
+        mid=$(( (lo + hi) / 2 ))
+        if [[ "${CATALOG[mid]}" < "$key" ]]; then
+            lo=$((mid + 1))
+        else
+            hi=$mid
+        fi
+    done
+    CATALOG_POS=$lo
+}
+
+# Set PKG_NAME, PKG_VERSION, PKG_SIZE (the revision for snaps) and
+# PKG_DESC from catalog line $1
+catalog_entry() {
+    local line="${CATALOG[$1]}"
+    PKG_NAME="${line%%$'\t'*}"
+    PKG_NAME="${PKG_NAME#*/}"
+    line="${line#*$'\t'}"
+    PKG_VERSION="${line%%$'\t'*}"
+    line="${line#*$'\t'}"
+    PKG_SIZE="${line%%$'\t'*}"
+    PKG_DESC="${line#*$'\t'}"
+}
+
+# Look up a package: catalog_lookup apt|snap NAME sets the PKG_* fields,
+# or fails if the catalog does not list it
+catalog_lookup() {
+    local kind="$1" name="$2"
+    load_catalog || return 1
+    catalog_lower_bound "${kind}/${name}"$'\t'
+    [[ "${CATALOG[CATALOG_POS]}" == "${kind}/${name}"$'\t'* ]] || return 1
+    catalog_entry "$CATALOG_POS"
+}
+
+# Search the catalog: catalog_search apt|snap TERM... sets CATALOG_MATCHES
+# to the catalog lines of the entries that have a word starting with every
+# TERM in their name or description, in name order
+catalog_search() {
+    local kind="$1" term line n i first=1 last
+    shift
+    CATALOG_MATCHES=()
+    load_catalog search || return 1
+    last=$CATALOG_APT_COUNT
+    if [ "$kind" == "snap" ]; then
+        first=$((CATALOG_APT_COUNT + 1))
+        last=$((CATALOG_APT_COUNT + CATALOG_SNAP_COUNT))
+    fi
+
+    # Sparse arrays keep their indices in order, which is name order
+    local -a matched hits
+    local first_term=true
+    for term in "$@"; do
+        term="${term,,}"
+        hits=()
+        catalog_lower_bound "token/${term}"
+        for ((i = CATALOG_POS; i < ${#CATALOG[@]}; i++)); do
+            line="${CATALOG[i]}"
+            [[ "$line" == "token/${term}"* ]] || break
+            for n in ${line#*$'\t'}; do
+                (( n >= first && n <= last )) && hits[n]=1
+            done
+        done
+        if $first_term; then
+            matched=()
+            for n in "${!hits[@]}"; do matched[n]=1; done
+            first_term=false
+        else
+            for n in "${!matched[@]}"; do
+                [ -n "${hits[n]}" ] || unset 'matched[n]'
+            done
+        fi
+    done
+    CATALOG_MATCHES=("${!matched[@]}")
+}
+
+# Milliseconds in a decimal number of seconds ("0.25" -> 250), into SANDBOX_MS
+seconds_to_ms() {
+    local whole="${1%%.*}" fraction=""
+    [[ "$1" == *.* ]] && fraction="${1#*.}"
+    fraction="${fraction}000"
+    SANDBOX_MS=$(( 10#${whole:-0} * 1000 + 10#${fraction:0:3} ))
+}
+
+# The pauses that make the mock commands look busy are multiplied by
+# TERMINAL_FUN_TIME_SCALE (set by the app): 1 is real time, 0.2 is the
+# instructors' fast mode and 0, for automated lesson runs, skips them
+if [[ "${TERMINAL_FUN_TIME_SCALE:-}" =~ ^[0-9]+(\.[0-9]*)?$ ]]; then
+    seconds_to_ms "$TERMINAL_FUN_TIME_SCALE"
+    SANDBOX_TIME_SCALE_PERMILLE=$SANDBOX_MS
+else
+    SANDBOX_TIME_SCALE_PERMILLE=1000
+fi
+
+# Pause for $1 milliseconds of scaled time; no sleep process at scale 0
+sandbox_sleep_ms() {
+    local ms=$(( $1 * SANDBOX_TIME_SCALE_PERMILLE / 1000 )) seconds
+    (( ms > 0 )) || return 0
+    printf -v seconds '%d.%03d' $((ms / 1000)) $((ms % 1000))
+    sleep "$seconds"
+}
+
+# Pause for $1 seconds (a decimal such as 0.25) of scaled time
+sandbox_sleep() {
+    seconds_to_ms "$1"
+    sandbox_sleep_ms "$SANDBOX_MS"
 }
 
 # Simulate typing/progress effect
@@ -252,7 +691,7 @@ simulate_progress() {
     local message="$1"
     local delay="${2:-0.02}"
     echo -n "$message"
-    sleep "$delay"
+    sandbox_sleep "$delay"
 }
 
 # Random number in range
@@ -272,15 +711,12 @@ fake_package_size() {
     fi
 }
 
-# Sleep with slight randomization for realism
+# Sleep with slight randomization for realism: $1 seconds plus up to $2 more
 realistic_sleep() {
-    local base="$1"
-    local variance="${2:-0.1}"
-    # Use bc if available, otherwise just sleep base time
-    if command -v bc &>/dev/null; then
-        local actual=$(echo "$base + ($RANDOM % 100) * $variance / 100" | bc -l 2>/dev/null || echo "$base")
-        sleep "$actual" 2>/dev/null || sleep "$base"
-    else
-        sleep "$base" 2>/dev/null || true
-    fi
+    local base variance
+    seconds_to_ms "$1"
+    base=$SANDBOX_MS
+    seconds_to_ms "${2:-0.1}"
+    variance=$SANDBOX_MS
+    sandbox_sleep_ms $(( base + RANDOM % 100 * variance / 100 ))
 }
@@ -0,0 +1,692 @@
+"""
+Virtual home provisioning for Terminal Fun.
+Creates the learner's practice home and the sandbox of mock commands, and
+builds the bubblewrap command line that isolates shells inside it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from package_catalog import CATALOG_FILE, default_entries, write_catalog
+
+
+# Scale for the pauses the mock commands make to look busy (downloads,
+# installs): 1 is real time, 0 no pauses at all
+TIME_SCALE_ENV = "TERMINAL_FUN_TIME_SCALE"
+TIME_SCALE_PRESETS = {'normal': 1.0, 'fast': 0.2, 'instant': 0.0}
+
+
+def parse_time_scale(value: Optional[str]) -> float:
+    """Time scale from a number or preset name; unset or invalid means real time."""
+    if not value:
+        return 1.0
+    value = value.strip().lower()
+    if value in TIME_SCALE_PRESETS:
+        return TIME_SCALE_PRESETS[value]
+    try:
+        scale = float(value)
+    except ValueError:
+        scale = -1.0
+    if not 0 <= scale < float('inf'):
+        print(f"Warning: Ignoring {TIME_SCALE_ENV}={value!r}, expected a number or "
+              f"one of {', '.join(TIME_SCALE_PRESETS)}")
+        return 1.0
+    return scale
+
+
+class VirtualHome:
+    """The learner's virtual home directory and its sandbox."""
+
+    def __init__(self, data_dir: Path, username: Optional[str] = None,
+                 time_scale: Optional[float] = None):
+        """
+        data_dir: per-user data directory holding the virtual home, the
+            sandbox and provisioning caches.
+        username: name shown inside the sandbox (default: $USER).
+        time_scale: how fast the mock commands' pauses run, 0 for none
+            (default: $TERMINAL_FUN_TIME_SCALE, or real time).
+        """
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / "virtual-home"
+        self.username = username or os.environ.get("USER", "learner")
+        if time_scale is None:
+            time_scale = parse_time_scale(os.environ.get(TIME_SCALE_ENV))
+        self.time_scale = time_scale
+        # Where the virtual home appears inside the bwrap sandbox
+        self.display_home = f"/home/{self.username}"
+        self.sandbox_bin: Optional[str] = None
+
+    def setup(self) -> str:
+        """Create (or bring up to date) the virtual home and sandbox.
+
+        Returns the path of the virtual home.
+        """
+        data_dir = self.data_dir
+        virtual_home = self.path
+
+        # Records what was last written so unchanged files are left alone
+        manifest = self._load_provision_manifest()
+        manifest_changed = False
+
+        # Create the virtual home if it doesn't exist
+        virtual_home.mkdir(parents=True, exist_ok=True)
+
+        # Create realistic home directory structure
+        common_dirs = [
+            "Documents",
+            "Downloads",
+            "Pictures",
+            "Music",
+            "Videos",
+            "Desktop",
+            "workspace",
+            "projects"
+        ]
+
+        for dir_name in common_dirs:
+            (virtual_home / dir_name).mkdir(exist_ok=True)
+
+        # Create a welcome README in the home directory
+        readme_path = virtual_home / "README.txt"
+        if not readme_path.exists():
+            readme_content = """Welcome to Terminal Fun!
+
+This is your practice terminal environment. Everything you do here is isolated
+from your real home directory, so feel free to experiment!
+
+Try these commands to get started:
+  ls          - List files and directories
+  pwd         - Print working directory
+  cd Desktop  - Change to Desktop directory
+  mkdir test  - Create a new directory
+
+Happy learning!
+"""
+            readme_path.write_text(readme_content)
+
+        # Create .bashrc for realistic path display
+        bashrc_path = virtual_home / ".bashrc"
+        # Get the real username for display
+        real_user = self.username
+        bashrc_content = f'''# Terminal Fun - Custom bash configuration
+# Makes the virtual home appear as /home/{real_user}
+
+# The real virtual home path (for internal use) - use canonical path
+export _REAL_HOME="$(cd "$HOME" && builtin pwd)"
+# The display home path (what users see)
+export _DISPLAY_HOME="/home/{real_user}"
+
+# Function to translate real paths to display paths
+_translate_path() {{
+    local path="$1"
+    # Handle both exact match and subdirectories
+    if [[ "$path" == "$_REAL_HOME"* ]]; then
+        echo "$_DISPLAY_HOME${{path#$_REAL_HOME}}"
+    else
+        echo "$path"
+    fi
+}}
+
+# Custom pwd that shows the translated path
+pwd() {{
+    local real_pwd
+    real_pwd=$(builtin pwd "$@")
+    _translate_path "$real_pwd"
+}}
+
+# Update prompt path before each command (no subshells: runs every prompt)
+_update_prompt_pwd() {{
+    local display_pwd="$PWD"
+    [[ "$display_pwd" == "$_REAL_HOME"* ]] && display_pwd="$_DISPLAY_HOME${{display_pwd#$_REAL_HOME}}"
+    # Set prompt display (with ~ for home)
+    _PWD_DISPLAY="${{display_pwd/$_DISPLAY_HOME/\\~}}"
+}}
+
+# Shell integration: tell Terminal Fun the working directory (OSC 7) and,
+# after each command, its exit status, duration and text (OSC 666 termprops).
+# Other terminals ignore these sequences.
+_tf_at_prompt=""
+_tf_cmd=""
+_tf_cmd_start=""
+_tf_seq=0
+
+# Percent-encode $1 into $_tf_url without forking
+_terminal_fun_urlencode() {{
+    local LC_ALL=C s="$1" c i
+    _tf_url=""
+    for (( i = 0; i < ${{#s}}; i++ )); do
+        c="${{s:i:1}}"
+        case "$c" in
+            [a-zA-Z0-9/._~-]) _tf_url+="$c" ;;
+            *) printf -v c '%%%02X' "'$c"; _tf_url+="$c" ;;
+        esac
+    done
+}}
+
+# DEBUG trap: note when the first command after a prompt starts
+_terminal_fun_preexec() {{
+    [ -n "$_tf_at_prompt" ] || return
+    [ "$BASH_COMMAND" = "_terminal_fun_prompt" ] && return
+    _tf_at_prompt=""
+    _tf_cmd_start="${{EPOCHREALTIME/[.,]/}}"
+}}
+
+# The line the learner typed, as history recorded it: $BASH_COMMAND only
+# holds the first simple command, with aliases expanded
+_terminal_fun_last_line() {{
+    local entry
+    entry=$(HISTTIMEFORMAT= builtin history 1)
+    [[ "$entry" =~ ^\ *[0-9]+\*?\ +(.*)$ ]] && _tf_cmd="${{BASH_REMATCH[1]}}" || _tf_cmd=""
+}}
+
+_terminal_fun_prompt() {{
+    local status=$? now duration
+    if [ -n "$_tf_cmd_start" ]; then
+        now="${{EPOCHREALTIME/[.,]/}}"
+        duration=$(( (now - _tf_cmd_start) / 1000 ))
+        _terminal_fun_last_line
+        _tf_seq=$(( _tf_seq + 1 ))
+        printf '\e]666;vte.ext.terminalfun.command=%s\a' "${{_tf_cmd//[[:cntrl:]]/ }}"
+        printf '\e]666;vte.ext.terminalfun.status=%d\a' "$status"
+        printf '\e]666;vte.ext.terminalfun.duration=%d\a' "$duration"
+        printf '\e]666;vte.ext.terminalfun.seq=%d\a' "$_tf_seq"
+        _tf_cmd_start=""
+    fi
+    _terminal_fun_urlencode "$PWD"
+    printf '\e]7;file://%s%s\a' "${{HOSTNAME:-localhost}}" "$_tf_url"
+    _update_prompt_pwd
+    _tf_at_prompt=1
+}}
+
+trap '_terminal_fun_preexec' DEBUG
+
+# Run before each prompt
+PROMPT_COMMAND=_terminal_fun_prompt
+
+# Set up the prompt - Ubuntu style (uses $_PWD_DISPLAY set by PROMPT_COMMAND)
+PS1='\\[\\033[01;32m\\]{real_user}@ubuntu\\[\\033[00m\\]:\\[\\033[01;34m\\]$_PWD_DISPLAY\\[\\033[00m\\]\\$ '
+
+# Color support for ls
+alias ls=\'ls --color=auto\'
+alias ll=\'ls -alF\'
+alias la=\'ls -A\'
+alias l=\'ls -CF\'
+
+# Color support for grep
+alias grep=\'grep --color=auto\'
+alias fgrep=\'fgrep --color=auto\'
+alias egrep=\'egrep --color=auto\'
+
+# Welcome message
+echo "Welcome to Terminal Fun!"
+echo "Your practice environment is ready at $_DISPLAY_HOME"
+echo ""
+'''
+        manifest_changed |= self._provision_text(bashrc_path, bashrc_content, manifest)
+
+        # Create a .vimrc with syntax highlighting enabled
+        vimrc_path = virtual_home / ".vimrc"
+        if not vimrc_path.exists():
+            vimrc_content = r"""====================================================================
+" Terminal Fun Vim Configuration
+" Optimized for learning with syntax highlighting enabled
+====================================================================
+
+" Enable syntax highlighting
+syntax on
+
+" Enable file type detection and plugins
+filetype plugin indent on
+
+" Set color scheme (works well with Ubuntu terminal colors)
+set background=dark
+
+" Show line numbers
+set number
+
+" Highlight current line
+set cursorline
+
+" Enable mouse support (useful for beginners)
+set mouse=a
+
+" Tab settings
+set tabstop=4           " Tab width
+set shiftwidth=4        " Indent width
+set expandtab           " Use spaces instead of tabs
+set smartindent         " Auto-indent new lines
+
+" Search settings
+set ignorecase          " Ignore case in search
+set smartcase           " Unless search contains uppercase
+set hlsearch            " Highlight search results
+set incsearch           " Incremental search
+
+" Show matching brackets
+set showmatch
+
+" Enable auto-completion menu
+set wildmenu
+set wildmode=longest:full,full
+
+" Display settings
+set ruler               " Show cursor position
+set showcmd             " Show incomplete commands
+set laststatus=2        " Always show status line
+
+" Better backspace behavior
+set backspace=indent,eol,start
+
+" Keep more context when scrolling
+set scrolloff=5
+
+" Encoding
+set encoding=utf-8
+
+" Enable persistent undo
+set undofile
+set undodir=~/.vim/undodir
+
+" Syntax highlighting for specific languages
+" (These are automatically enabled when files are detected)
+" Supported: C, C++, Python, JavaScript, Java, C#, Zig, Rust, YAML, JSON
+
+" Language-specific settings
+autocmd FileType python setlocal tabstop=4 shiftwidth=4 expandtab
+autocmd FileType javascript setlocal tabstop=2 shiftwidth=2 expandtab
+autocmd FileType java setlocal tabstop=4 shiftwidth=4 expandtab
+autocmd FileType c,cpp setlocal tabstop=4 shiftwidth=4 expandtab
+autocmd FileType cs setlocal tabstop=4 shiftwidth=4 expandtab
+autocmd FileType rust setlocal tabstop=4 shiftwidth=4 expandtab
+autocmd FileType zig setlocal tabstop=4 shiftwidth=4 expandtab
+autocmd FileType yaml,yml setlocal tabstop=2 shiftwidth=2 expandtab
+autocmd FileType json setlocal tabstop=2 shiftwidth=2 expandtab
+
+" Visual feedback
+set visualbell          " Use visual bell instead of beeping
+
+" Status line (shows file type and position)
+set statusline=%F%m%r%h%w\ [TYPE=%Y]\ [POS=%l,%v][%p%%]
+
+" Welcome message for new users
+" Press 'i' to enter Insert mode, 'Esc' to return to Normal mode
+"""
+            vimrc_path.write_text(vimrc_content)
+
+        # Create .vim directory for undo history
+        vim_dir = virtual_home / ".vim" / "undodir"
+        vim_dir.mkdir(parents=True, exist_ok=True)
+
+        # Create .gitconfig with sensible defaults
+        gitconfig_path = virtual_home / ".gitconfig"
+        if not gitconfig_path.exists():
+            gitconfig_content = """[user]
+\tname = Terminal Fun Student
+\temail = student@terminalfun.local
+
+[init]
+\tdefaultBranch = main
+
+[core]
+\teditor = vim
+\tautocrlf = input
+
+[color]
+\tui = auto
+\tbranch = auto
+\tdiff = auto
+\tstatus = auto
+
+[color "branch"]
+\tcurrent = yellow reverse
+\tlocal = yellow
+\tremote = green
+
+[color "diff"]
+\tmeta = yellow bold
+\tfrag = magenta bold
+\told = red bold
+\tnew = green bold
+
+[color "status"]
+\tadded = green
+\tchanged = yellow
+\tuntracked = red
+
+[alias]
+\tst = status
+\tco = checkout
+\tbr = branch
+\tci = commit
+\tlog1 = log --oneline --graph --decorate
+\tlast = log -1 HEAD
+\tunstage = reset HEAD --
+
+[pull]
+\trebase = false
+
+[push]
+\tdefault = simple
+
+[help]
+\tautocorrect = 1
+"""
+            gitconfig_path.write_text(gitconfig_content)
+
+        # Set up sandbox for mock commands
+        manifest_changed |= self._setup_sandbox(data_dir, manifest)
+
+        if manifest_changed:
+            self._save_provision_manifest(manifest)
+
+        return str(virtual_home)
+
+    def _load_provision_manifest(self) -> dict:
+        """Load the record of files written by previous provisioning runs."""
+        manifest_file = self.data_dir / "provision-manifest.json"
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def _save_provision_manifest(self, manifest: dict):
+        """Save the provisioning manifest."""
+        manifest_file = self.data_dir / "provision-manifest.json"
+        try:
+            with open(manifest_file, 'w') as f:
+                json.dump(manifest, f)
+        except IOError as e:
+            print(f"Warning: Could not save provisioning manifest: {e}")
+
+    @staticmethod
+    def _stat_signature(path: Path) -> Optional[list]:
+        """Size and mtime of a file, or None if it does not exist."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _provision_text(self, path: Path, content: str, manifest: dict) -> bool:
+        """Write a generated file unless it already holds this content.
+
+        Returns True if the file was written and the manifest updated.
+        """
+        key = str(path)
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        entry = manifest.get(key)
+        if (entry and entry.get('sha256') == digest and
+                entry.get('stat') == self._stat_signature(path)):
+            return False
+
+        path.write_text(content)
+        manifest[key] = {'sha256': digest, 'stat': self._stat_signature(path)}
+        return True
+
+    def _provision_copy(self, source: Path, dest: Path, manifest: dict) -> bool:
+        """Copy a sandbox file unless the destination is already current.
+
+        Returns True if the file was copied and the manifest updated.
+        """
+        key = str(dest)
+        source_stat = self._stat_signature(source)
+        entry = manifest.get(key)
+        if (entry and entry.get('source_stat') == source_stat and
+                entry.get('stat') == self._stat_signature(dest)):
+            return False
+
+        shutil.copy2(source, dest)
+        dest.chmod(0o755)
+        manifest[key] = {
+            'source_stat': source_stat,
+            'stat': self._stat_signature(dest)
+        }
+        return True
+
+    def _provision_catalog(self, source_dir: Path, dest: Path, manifest: dict) -> bool:
+        """Compile the package catalog unless it is current with its sources.
+
+        Returns True if the catalog was rebuilt and the manifest updated.
+        """
+        key = str(dest)
+        sources = sorted(source_dir.glob("*.tsv")) if source_dir.is_dir() else []
+        source_stats = {source.name: self._stat_signature(source) for source in sources}
+        entry = manifest.get(key)
+        if (entry and entry.get('source_stats') == source_stats and
+                entry.get('stat') == self._stat_signature(dest)):
+            return False
+
+        try:
+            write_catalog(dest, default_entries(source_dir))
+        except (IOError, OSError) as e:
+            print(f"Warning: Could not build package catalog: {e}")
+            return False
+        manifest[key] = {
+            'source_stats': source_stats,
+            'stat': self._stat_signature(dest)
+        }
+        return True
+
+    def find_bwrap(self, use_cache: bool = True) -> Optional[str]:
+        """Find the bubblewrap (bwrap) binary, checking snap location first.
+
+        Returns the path to bwrap if found and functional, or None if not available
+        or if it cannot create user namespaces (e.g., blocked by snap confinement).
+        The result of the namespace probe is cached across launches and only
+        re-probed when the bwrap binary, kernel or snap revision changes.
+        """
+        bwrap_path = None
+
+        # Check if running in snap
+        snap_dir = os.environ.get("SNAP")
+        if snap_dir:
+            snap_bwrap = Path(snap_dir) / "usr" / "bin" / "bwrap"
+            if snap_bwrap.exists():
+                bwrap_path = str(snap_bwrap)
+
+        # Fall back to system bwrap
+        if not bwrap_path:
+            system_bwrap = shutil.which("bwrap")
+            if system_bwrap:
+                bwrap_path = system_bwrap
+
+        if not bwrap_path:
+            return None
+
+        probe_key = self._bwrap_probe_key(bwrap_path)
+        if use_cache:
+            usable = self._load_bwrap_probe(probe_key)
+            if usable is not None:
+                return bwrap_path if usable else None
+
+        # Test if bwrap can actually run with PID namespace isolation
+        # This may fail in snap confinement even if the binary exists
+        try:
+            result = subprocess.run(
+                [bwrap_path, "--unshare-pid", "--", "/bin/true"],
+                capture_output=True,
+                timeout=5
+            )
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+            # bwrap failed to run properly (not cached, may be transient)
+            return None
+
+        usable = result.returncode == 0
+        self._save_bwrap_probe(probe_key, usable)
+        # If not usable, bwrap exists but can't create namespaces
+        return bwrap_path if usable else None
+
+    def _bwrap_probe_key(self, bwrap_path: str) -> dict:
+        """Everything that can change the outcome of the bwrap probe."""
+        try:
+            mtime_ns = os.stat(bwrap_path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        return {
+            'path': bwrap_path,
+            'mtime_ns': mtime_ns,
+            'kernel': os.uname().release,
+            'snap_revision': os.environ.get("SNAP_REVISION"),
+        }
+
+    def _load_bwrap_probe(self, probe_key: dict) -> Optional[bool]:
+        """Return the cached probe result for probe_key, or None if unknown."""
+        probe_file = self.data_dir / "bwrap-probe.json"
+        try:
+            with open(probe_file, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+        if not isinstance(data, dict) or data.get('key') != probe_key:
+            return None
+        return bool(data.get('usable'))
+
+    def _save_bwrap_probe(self, probe_key: dict, usable: bool):
+        """Persist the probe result for later launches."""
+        probe_file = self.data_dir / "bwrap-probe.json"
+        try:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            with open(probe_file, 'w') as f:
+                json.dump({'key': probe_key, 'usable': usable}, f)
+        except IOError as e:
+            print(f"Warning: Could not save bwrap probe result: {e}")
+
+    def invalidate_bwrap_probe(self):
+        """Forget the cached probe result so the next start re-probes."""
+        try:
+            (self.data_dir / "bwrap-probe.json").unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Could not remove bwrap probe result: {e}")
+
+    def _setup_sandbox(self, data_dir: Path, manifest: dict) -> bool:
+        """Set up the sandbox with mock commands for privileged operations.
+
+        Returns True if any file was (re)copied.
+        """
+        changed = False
+        sandbox_dir = data_dir / "sandbox"
+        sandbox_bin = sandbox_dir / "bin"
+        sandbox_lib = sandbox_dir / "lib"
+        sandbox_state = sandbox_dir / "state"
+
+        # Create sandbox directories
+        sandbox_bin.mkdir(parents=True, exist_ok=True)
+        sandbox_lib.mkdir(parents=True, exist_ok=True)
+        sandbox_state.mkdir(parents=True, exist_ok=True)
+
+        # Find the source sandbox directory (in the app's installation)
+        # First, try relative to this script
+        script_dir = Path(__file__).parent
+        source_sandbox = script_dir / "sandbox"
+
+        # If running from snap, check snap location
+        if not source_sandbox.exists():
+            snap_dir = os.environ.get("SNAP")
+            if snap_dir:
+                source_sandbox = Path(snap_dir) / "sandbox"
+
+        if source_sandbox.exists():
+            # Copy sandbox scripts to user's sandbox directory
+            source_bin = source_sandbox / "bin"
+            source_lib = source_sandbox / "lib"
+
+            if source_bin.exists():
+                for script in source_bin.iterdir():
+                    dest = sandbox_bin / script.name
+                    changed |= self._provision_copy(script, dest, manifest)
+
+            if source_lib.exists():
+                for lib_file in source_lib.iterdir():
+                    dest = sandbox_lib / lib_file.name
+                    changed |= self._provision_copy(lib_file, dest, manifest)
+
+            changed |= self._provision_catalog(source_sandbox / "catalog",
+                                               sandbox_lib / CATALOG_FILE, manifest)
+
+        # Store sandbox path for use in terminal setup
+        self.sandbox_bin = str(sandbox_bin)
+        return changed
+
+    def build_sandbox_argv(self, bwrap_bin: str) -> List[str]:
+        """Build the bwrap command prefix that isolates a shell in the virtual home.
+
+        The returned argv stops before --chdir and the command to run, so it
+        is shared by the terminal shell and verification commands.
+        """
+        username = self.username
+        fake_home = self.display_home
+        # Build the bwrap command with namespace isolation
+        # Note: --unshare-user is not used because snap confinement blocks
+        # access to /proc/sys/kernel/overflowuid required for user namespaces
+        argv = [
+            bwrap_bin,
+            "--unshare-pid",         # Create new PID namespace
+            "--unshare-uts",         # Create new UTS namespace (hostname)
+        ]
+
+        # Bind system directories read-only
+        system_dirs = ["/usr", "/bin", "/sbin", "/lib", "/lib64", "/etc"]
+        for sdir in system_dirs:
+            if os.path.exists(sdir):
+                argv.extend(["--ro-bind", sdir, sdir])
+
+        # Bind /proc and /dev
+        argv.extend(["--proc", "/proc"])
+        argv.extend(["--dev", "/dev"])
+
+        # Create tmpfs for /tmp
+        argv.extend(["--tmpfs", "/tmp"])
+
+        # Bind virtual home to fake home path
+        argv.extend(["--bind", str(self.path), fake_home])
+
+        # Create /home directory structure
+        argv.extend(["--dir", "/home"])
+
+        # Bind the sandbox to /opt/sandbox for mock commands: the scripts
+        # source ../lib and keep their state in ../state
+        if self.sandbox_bin:
+            sandbox_dir = Path(self.sandbox_bin).parent
+            argv.extend(["--dir", "/opt"])
+            argv.extend(["--dir", "/opt/sandbox"])
+            argv.extend(["--ro-bind", self.sandbox_bin, "/opt/sandbox/bin"])
+            argv.extend(["--ro-bind", str(sandbox_dir / "lib"), "/opt/sandbox/lib"])
+            argv.extend(["--bind", str(sandbox_dir / "state"), "/opt/sandbox/state"])
+
+        # Set environment variables inside the sandbox
+        argv.extend(["--setenv", "HOME", fake_home])
+        argv.extend(["--setenv", "USER", username])
+        argv.extend(["--setenv", "SHELL", "/bin/bash"])
+        argv.extend(["--setenv", "TERM", os.environ.get("TERM", "xterm-256color")])
+        argv.extend(["--setenv", TIME_SCALE_ENV, f"{self.time_scale:.3f}"])
+
+        # Build PATH with sandbox bin first
+        if self.sandbox_bin:
+            sandbox_path = "/opt/sandbox/bin:/usr/local/bin:/usr/bin:/bin"
+        else:
+            sandbox_path = "/usr/local/bin:/usr/bin:/bin"
+        argv.extend(["--setenv", "PATH", sandbox_path])
+
+        return argv
+
+    def shell_environment(self, base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Environment for a shell in the virtual home when bwrap is unavailable."""
+        env = dict(os.environ if base is None else base)
+        env["HOME"] = str(self.path)
+        env["PWD"] = str(self.path)
+        env[TIME_SCALE_ENV] = f"{self.time_scale:.3f}"
+
+        # Prepend sandbox bin to PATH for mock commands
+        if self.sandbox_bin:
+            current_path = env.get("PATH", "/usr/bin:/bin")
+            env["PATH"] = f"{self.sandbox_bin}:{current_path}"
+        return env